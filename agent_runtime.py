@@ -0,0 +1,304 @@
+import importlib
+import multiprocessing
+import os
+import queue
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+AGENT_TIME_LIMIT = 2.0
+MAX_TURNS = 250
+# Hard cap on one ponder, so an abandoned game cannot keep a core busy for long
+PONDER_TIME_LIMIT = 30.0
+
+# Number of processes an agent's own search may use (e.g. agents/mcts_agent.py). Unset means
+# every core, which suits the interactive game. headless.py and tournament.py set it to 1
+# because they already run agents side by side, and oversubscribed cores would skew the
+# wall-clock time limit.
+AGENT_SEARCH_WORKERS_ENV = "XOSHIFT_AGENT_SEARCH_WORKERS"
+
+
+def agent_process_wrapper(agent_fn: Callable, board_copy: List[List[Optional[str]]],
+                          player_symbol: str, result_queue: multiprocessing.Queue):
+    try:
+        move = agent_fn(board_copy, player_symbol)
+        result_queue.put(move)
+    except Exception as e:
+        result_queue.put(e)
+
+
+def agent_search_workers() -> int:
+    """
+    The number of search processes an agent may use, from AGENT_SEARCH_WORKERS_ENV.
+    """
+    value = os.environ.get(AGENT_SEARCH_WORKERS_ENV)
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            print(f"Ignoring invalid {AGENT_SEARCH_WORKERS_ENV}={value!r}.")
+    return os.cpu_count() or 1
+
+
+def limit_agent_search_workers(workers: Optional[int] = None) -> None:
+    """
+    Sets AGENT_SEARCH_WORKERS_ENV for the agents started afterwards, in this process or in
+    worker processes. None keeps a value the user already exported and otherwise uses 1.
+    """
+    if workers is not None:
+        os.environ[AGENT_SEARCH_WORKERS_ENV] = str(max(1, workers))
+    else:
+        os.environ.setdefault(AGENT_SEARCH_WORKERS_ENV, "1")
+
+
+def load_agent(agent_filename: str):
+    """
+    Dynamically import an agent from agents/<agent_filename>.py
+    Returns the agent_move function.
+    """
+    module_name = agent_filename.replace(".py", "")
+    full_module = f"agents.{module_name}"
+
+    try:
+        agent_module = importlib.import_module(full_module)
+    except ModuleNotFoundError:
+        raise ValueError(f"Agent module '{full_module}' not found.")
+
+    if not hasattr(agent_module, "agent_move"):
+        raise ValueError(f"Agent '{agent_filename}' must define a function called 'agent_move'.")
+
+    return agent_module.agent_move
+
+
+def load_agent_ponder(agent_filename: str) -> Optional[Callable]:
+    """
+    Returns the optional agent_ponder function of agents/<agent_filename>.py, or None.
+
+    An agent that defines agent_ponder(board, player_symbol, should_stop) is called with the
+    board right after its own move (the opponent to move) and its own symbol while the
+    opponent thinks. It must return soon after should_stop() becomes True; what it learns
+    can be kept in module state for the next agent_move call.
+    """
+    module_name = agent_filename.replace(".py", "")
+    agent_module = importlib.import_module(f"agents.{module_name}")
+    return getattr(agent_module, "agent_ponder", None)
+
+
+def run_agent_with_timeout(agent_fn: Callable, board: List[List[Optional[str]]], player_symbol: str,
+                           time_limit: float = AGENT_TIME_LIMIT) -> Tuple[Any, Optional[Exception], bool]:
+    """
+    Runs one agent move in a separate process and enforces the time limit.
+
+    Returns:
+        A tuple (move, exception, timed_out). At most one of `exception` and
+        `timed_out` is set; `move` is whatever the agent returned.
+    """
+    board_copy = [[cell for cell in row] for row in board]
+    result_queue = multiprocessing.Queue()
+    agent_process = multiprocessing.Process(target=agent_process_wrapper,
+                                            args=(agent_fn, board_copy, player_symbol, result_queue))
+    agent_process.start()
+    agent_move_coords, agent_exception, timed_out = None, None, False
+
+    try:
+        agent_output = result_queue.get(timeout=time_limit)
+        if isinstance(agent_output, Exception):
+            agent_exception = agent_output
+        else:
+            agent_move_coords = agent_output
+    except queue.Empty:
+        timed_out = True
+    except Exception as e:
+        agent_exception = e
+
+    if agent_process.is_alive():
+        agent_process.terminate()
+    agent_process.join(timeout=0.5)
+    if agent_process.is_alive():
+        agent_process.kill()
+        agent_process.join()
+
+    return agent_move_coords, agent_exception, timed_out
+
+
+def _agent_worker_main(agent_filename: str, conn) -> None:
+    try:
+        agent_fn = load_agent(agent_filename)
+        ponder_fn = load_agent_ponder(agent_filename)
+    except Exception as e:
+        conn.send(("error", e))
+        conn.close()
+        return
+    conn.send(("ready", None))
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        kind, board, player_symbol = request
+
+        if kind == "ponder":
+            # No reply; the next message on the pipe (or the time cap) stops the pondering
+            if ponder_fn is not None:
+                deadline = time.monotonic() + PONDER_TIME_LIMIT
+                try:
+                    ponder_fn(board, player_symbol, lambda: conn.poll() or time.monotonic() > deadline)
+                except Exception as e:
+                    print(f"Agent '{agent_filename}' failed while pondering: {e!r}")
+            continue
+        if kind == "stop":
+            # Any ponder has returned by the time this is read
+            conn.send(("stopped", None))
+            continue
+
+        try:
+            reply = ("move", agent_fn(board, player_symbol))
+        except Exception as e:
+            reply = ("error", e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # The move or exception could not be pickled
+            conn.send(("error", RuntimeError(f"Agent reply could not be sent: {e!r}")))
+    conn.close()
+
+
+class AgentWorker:
+    """
+    A long-lived process that imports one agent once and answers move requests over a pipe.
+
+    request() has the same contract as run_agent_with_timeout, but the process is only
+    restarted when the agent hangs past the time limit or the process dies. ponder() lets an
+    agent that supports it keep searching while the opponent is to move. The process is
+    not daemonic, so agents may start their own worker processes; call close() when done.
+    """
+    STARTUP_TIMEOUT = 30.0
+    # A pondering worker that does not stop within this time is restarted
+    PONDER_STOP_TIMEOUT = 1.0
+
+    def __init__(self, agent_filename: str):
+        self.agent_filename = agent_filename
+        self._process: Optional[multiprocessing.Process] = None
+        self._conn = None
+        self._pondering = False
+        self.restarts = 0
+
+    def start(self) -> None:
+        """
+        Starts the worker and waits until the agent module is imported, so import time is
+        never charged to a move. Raises ValueError if the agent cannot be loaded.
+        """
+        parent_conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(target=_agent_worker_main,
+                                                args=(self.agent_filename, child_conn))
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+
+        if not parent_conn.poll(self.STARTUP_TIMEOUT):
+            self.close()
+            raise ValueError(f"Agent '{self.agent_filename}' did not start within {self.STARTUP_TIMEOUT}s.")
+        try:
+            kind, payload = parent_conn.recv()
+        except EOFError:
+            kind, payload = "error", RuntimeError("worker exited during startup")
+        if kind != "ready":
+            self.close()
+            raise ValueError(f"Error loading agent '{self.agent_filename}': {payload}")
+
+    def restart(self) -> None:
+        """
+        Replaces a hung or dead worker without waiting for it to finish.
+        """
+        self.close(graceful=False)
+        self.restarts += 1
+        self.start()
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def request(self, board: List[List[Optional[str]]], player_symbol: str,
+                time_limit: float = AGENT_TIME_LIMIT) -> Tuple[Any, Optional[Exception], bool]:
+        if self._process is None:
+            self.start()
+        elif not self.is_alive():
+            self.restart()
+        else:
+            # Stopping a ponder takes a moment; it must not count against the move's time limit
+            self.stop_ponder()
+
+        board_copy = [[cell for cell in row] for row in board]
+        try:
+            self._conn.send(("move", board_copy, player_symbol))
+        except (BrokenPipeError, OSError):
+            self.restart()
+            self._conn.send(("move", board_copy, player_symbol))
+
+        if not self._conn.poll(time_limit):
+            # The agent is still thinking; its late answer must never be read, so kill it
+            self.restart()
+            return None, None, True
+
+        try:
+            kind, payload = self._conn.recv()
+        except EOFError:
+            self.restart()
+            return None, RuntimeError("Agent worker process died."), False
+        if kind == "move":
+            return payload, None, False
+        return None, payload, False
+
+    def ponder(self, board: List[List[Optional[str]]], player_symbol: str) -> None:
+        """
+        Lets the agent think on `board` (the opponent of `player_symbol` to move) until the
+        next request arrives. Does nothing for agents without agent_ponder, and never
+        starts or restarts the worker.
+        """
+        if not self.is_alive():
+            return
+        board_copy = [[cell for cell in row] for row in board]
+        try:
+            self._conn.send(("ponder", board_copy, player_symbol))
+            self._pondering = True
+        except (BrokenPipeError, OSError):
+            pass
+
+    def stop_ponder(self) -> None:
+        """
+        Interrupts a ponder and waits until the worker is idle again, e.g. when a game is
+        abandoned. Does nothing if the worker is not pondering.
+        """
+        if not self._pondering:
+            return
+        self._pondering = False
+        try:
+            self._conn.send(("stop", None, None))
+            if self._conn.poll(self.PONDER_STOP_TIMEOUT):
+                self._conn.recv()
+                return
+        except (BrokenPipeError, EOFError, OSError):
+            pass
+        self.restart()
+
+    def close(self, graceful: bool = True) -> None:
+        self._pondering = False
+        if self._conn is not None:
+            if graceful:
+                try:
+                    self._conn.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+            self._conn.close()
+            self._conn = None
+        if self._process is not None:
+            if graceful:
+                self._process.join(timeout=0.5)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(timeout=0.5)
+            if self._process.is_alive():
+                self._process.kill()
+                self._process.join()
+            self._process = None
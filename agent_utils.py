@@ -1,5 +1,8 @@
 from typing import List, Optional, Tuple
 
+from move_tables import get_move_table
+from zobrist import get_zobrist_keys
+
 EMPTY_CELL = None
 
 
@@ -14,20 +17,14 @@ def get_possible_selections(board: List[List[Optional[str]]], player_symbol: str
     Returns:
         A list of (row, col) tuples representing valid cells to select.
     """
-    size = len(board)
-    rim_cells_coords = []
-    for r_idx in range(size):
-        for c_idx in range(size):
-            if r_idx == 0 or r_idx == size - 1 or c_idx == 0 or c_idx == size - 1:
-                rim_cells_coords.append((r_idx, c_idx))
-
     empty_rim_selections = []
     player_rim_selections = []
 
-    for r, c in rim_cells_coords:
-        if board[r][c] == EMPTY_CELL:
+    for r, c in get_move_table(len(board)).rim_cells:
+        cell = board[r][c]
+        if cell == EMPTY_CELL:
             empty_rim_selections.append((r, c))
-        elif board[r][c] == player_symbol:
+        elif cell == player_symbol:
             player_rim_selections.append((r, c))
 
     # The rule is: if empty cells exist on the rim, player MUST select one of them.
@@ -49,30 +46,185 @@ def get_all_valid_moves(board: List[List[Optional[str]]], player_symbol: str) ->
     Returns:
         A list of valid moves, where each move is a tuple (src_r, src_c, tgt_r, tgt_c).
     """
-    size = len(board)
     possible_selections = get_possible_selections(board, player_symbol)
 
     if not possible_selections:
         return []
 
+    moves_by_source = get_move_table(len(board)).moves_by_source
     all_genuinely_valid_moves: List[Tuple[int, int, int, int]] = []
+    for src in possible_selections:
+        all_genuinely_valid_moves.extend(moves_by_source[src])
 
-    for sr, sc in possible_selections:
-        candidate_targets_for_src = [
-            (sr, 0),
-            (sr, size - 1),
-            (0, sc),
-            (size - 1, sc)
-        ]
+    return all_genuinely_valid_moves
 
-        actual_targets_for_src = set()
 
-        for tr, tc in candidate_targets_for_src:
-            if sr == tr and sc == tc:  # Target cannot be the source itself
-                continue
-            actual_targets_for_src.add((tr, tc))
+def push_on_board(board: List[List[Optional[str]]], move: Tuple[int, int, int, int], player_symbol: str) -> int:
+    """
+    Applies a push to `board` in place, without validation: the pieces between source and
+    target slide one step towards the source and `player_symbol` lands on the target.
+    Copy the board first to keep the original.
 
-        for tr_final, tc_final in list(actual_targets_for_src):
-            all_genuinely_valid_moves.append((sr, sc, tr_final, tc_final))
+    Args:
+        board: The board to modify.
+        move: The move (src_r, src_c, tgt_r, tgt_c) being played.
+        player_symbol: The symbol of the player making the move.
 
-    return all_genuinely_valid_moves
+    Returns:
+        The mask of win lines (see MoveTable.lines) the push touched.
+    """
+    cells, line_mask = get_move_table(len(board)).shift_path(*move)
+    incoming = player_symbol
+    for r, c in reversed(cells):
+        board[r][c], incoming = incoming, board[r][c]
+    return line_mask
+
+
+def get_board_hash(board: List[List[Optional[str]]], player_symbol: str) -> int:
+    """
+    Computes the 64-bit Zobrist hash of a position from scratch.
+
+    Args:
+        board: The current game board state.
+        player_symbol: The symbol of the player to move.
+
+    Returns:
+        The same value XOShiftGame.zobrist_hash reports for this position.
+    """
+    keys = get_zobrist_keys(len(board))
+    return keys.board_key(board) ^ keys.side_to_move_key(player_symbol)
+
+
+def get_hash_after_move(board_hash: int, board: List[List[Optional[str]]],
+                        move: Tuple[int, int, int, int], player_symbol: str) -> int:
+    """
+    Updates a Zobrist hash for a move without rebuilding it from the whole board.
+
+    Args:
+        board_hash: Hash of `board` with `player_symbol` to move.
+        board: The board *before* the move is applied (it is not modified).
+        move: The move (src_r, src_c, tgt_r, tgt_c) being played.
+        player_symbol: The symbol of the player making the move.
+
+    Returns:
+        The hash of the resulting position, with the opponent to move.
+    """
+    size = len(board)
+    keys = get_zobrist_keys(size)
+    cells, _ = get_move_table(size).shift_path(*move)
+
+    incoming = player_symbol
+    for r, c in reversed(cells):
+        previous = board[r][c]
+        if previous != incoming:
+            cell_idx = r * size + c
+            if previous is not None:
+                board_hash ^= keys.cell_keys[previous][cell_idx]
+            if incoming is not None:
+                board_hash ^= keys.cell_keys[incoming][cell_idx]
+        incoming = previous
+    return board_hash ^ keys.side_key
+
+
+_CELL_ORDER = {None: 0, 'X': 1, 'O': 2}
+
+
+def transform_board(board: List[List[Optional[str]]], transform: int) -> List[List[Optional[str]]]:
+    """
+    Applies one of the 8 symmetries of the square (see MoveTable.symmetries) to a board.
+    """
+    size = len(board)
+    sources = get_move_table(size).symmetry_sources[transform]
+    flat = [cell for row in board for cell in row]
+    return [[flat[sources[r * size + c]] for c in range(size)] for r in range(size)]
+
+
+def transform_move(move: Tuple[int, int, int, int], size: int, transform: int) -> Tuple[int, int, int, int]:
+    """
+    Maps a move onto the transformed board; pushes stay pushes under every symmetry.
+    """
+    images = get_move_table(size).symmetries[transform]
+    sr, sc, tr, tc = move
+    src = images[sr * size + sc]
+    tgt = images[tr * size + tc]
+    return src[0], src[1], tgt[0], tgt[1]
+
+
+def inverse_transform(size: int, transform: int) -> int:
+    return get_move_table(size).inverse_symmetry[transform]
+
+
+def canonicalize_board(board: List[List[Optional[str]]]) -> Tuple[List[List[Optional[str]]], int]:
+    """
+    Maps a board to the representative of its symmetry class.
+
+    Args:
+        board: The current game board state.
+
+    Returns:
+        A tuple (canonical_board, transform) with canonical_board == transform_board(board, transform).
+        Every board in the same class gets the same canonical board. Map moves chosen on the
+        canonical board back with transform_move(move, size, inverse_transform(size, transform)).
+    """
+    size = len(board)
+    codes = [_CELL_ORDER[cell] for row in board for cell in row]
+    best_key, best_transform = None, 0
+    for transform, sources in enumerate(get_move_table(size).symmetry_sources):
+        key = [codes[i] for i in sources]
+        if best_key is None or key < best_key:
+            best_key, best_transform = key, transform
+    return transform_board(board, best_transform), best_transform
+
+
+def get_canonical_board_hash(board: List[List[Optional[str]]], player_symbol: str) -> int:
+    """
+    Zobrist hash (see get_board_hash) of the canonical form of the position, so all
+    symmetric positions share one key.
+    """
+    canonical_board, _ = canonicalize_board(board)
+    return get_board_hash(canonical_board, player_symbol)
+
+
+OPENING_BOOK_MIN_GAMES = 3
+
+
+def query_opening_book(board: List[List[Optional[str]]], player_symbol: str,
+                       min_games: int = OPENING_BOOK_MIN_GAMES) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Looks the position up in the compiled opening book (see opening_book.py).
+
+    Args:
+        board: The current game board state.
+        player_symbol: The symbol of the player to move.
+        min_games: Moves seen in fewer games than this are ignored.
+
+    Returns:
+        The legal book move with the best score (wins plus half the draws, per game),
+        mapped back onto `board`; None if there is no book or no move qualifies.
+    """
+    # Imported here because opening_book itself builds on this module
+    from opening_book import get_opening_book
+
+    size = len(board)
+    book = get_opening_book(size)
+    if book is None:
+        return None
+
+    canonical_board, transform = canonicalize_board(board)
+    entries = book.lookup(get_board_hash(canonical_board, player_symbol))
+    if not entries:
+        return None
+
+    valid_moves = set(get_all_valid_moves(board, player_symbol))
+    moves = get_move_table(size).moves
+    undo = inverse_transform(size, transform)
+    best_move, best_score = None, -1.0
+    for code, wins, draws, losses in entries:
+        games = wins + draws + losses
+        if games < min_games or code >= len(moves):
+            continue
+        move = transform_move(moves[code], size, undo)
+        score = (wins + 0.5 * draws) / games
+        if move in valid_moves and score > best_score:
+            best_move, best_score = move, score
+    return best_move
@@ -0,0 +1,216 @@
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+from agent_runtime import agent_search_workers
+from agent_utils import get_all_valid_moves, push_on_board
+from move_tables import MoveTable, get_move_table
+
+# Timing configuration
+TIME_LIMIT: float = 2.0
+SAFETY_MARGIN: float = 0.2
+# Time kept back for collecting and merging the root statistics of the workers
+MERGE_MARGIN: float = 0.1
+
+# Search configuration
+EXPLORATION: float = 1.4
+# Random playouts still running after this many plies count as draws
+MAX_PLAYOUT_PLIES: int = 80
+# Root parallelism: one independent tree per worker, this process included. None defers to
+# agent_runtime.AGENT_SEARCH_WORKERS_ENV: every core in the interactive game, one process under
+# headless.py and tournament.py (see agent_runtime.limit_agent_search_workers).
+SEARCH_WORKERS: Optional[int] = None
+
+# Pool of helper processes, created on the first move and kept for the whole game
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_unavailable = False
+
+
+def opponent(player_symbol: str) -> str:
+    return 'O' if player_symbol == 'X' else 'X'
+
+
+def play(board: List[List[Optional[str]]], move: Optional[Tuple[int, int, int, int]],
+         player_symbol: str, table: MoveTable) -> Optional[str]:
+    """
+    Applies `move` in place (None is a pass) and returns the winner it produces, if any.
+    Only the lines the push touched are checked, X before O like XOShiftGame.
+    """
+    if move is None:
+        return None
+    line_mask = push_on_board(board, move, player_symbol)
+
+    for symbol in ('X', 'O'):
+        mask = line_mask
+        while mask:
+            low_bit = mask & -mask
+            mask ^= low_bit
+            if all(board[r][c] == symbol for r, c in table.lines[low_bit.bit_length() - 1]):
+                return symbol
+    return None
+
+
+class Node:
+    """
+    A position in the search tree. `wins` is counted for the player who made `move`,
+    i.e. the parent's side to move; draws count half.
+    """
+    __slots__ = ("move", "parent", "player", "winner", "untried", "children", "visits", "wins")
+
+    def __init__(self, board: List[List[Optional[str]]], player: str,
+                 move: Optional[Tuple[int, int, int, int]] = None,
+                 parent: Optional["Node"] = None, winner: Optional[str] = None):
+        self.move = move
+        self.parent = parent
+        self.player = player
+        self.winner = winner
+        self.children: List[Node] = []
+        self.visits = 0
+        self.wins = 0.0
+        if winner is not None:
+            self.untried: List[Optional[Tuple[int, int, int, int]]] = []
+        else:
+            # A player without a legal move passes
+            self.untried = list(get_all_valid_moves(board, player)) or [None]
+
+    def select_child(self) -> "Node":
+        log_visits = math.log(self.visits)
+        return max(self.children,
+                   key=lambda child: child.wins / child.visits
+                   + EXPLORATION * math.sqrt(log_visits / child.visits))
+
+
+def playout(board: List[List[Optional[str]]], player_symbol: str,
+            rng: random.Random, table: MoveTable) -> Optional[str]:
+    for _ in range(MAX_PLAYOUT_PLIES):
+        moves = get_all_valid_moves(board, player_symbol)
+        if moves:
+            winner = play(board, rng.choice(moves), player_symbol, table)
+            if winner is not None:
+                return winner
+        player_symbol = opponent(player_symbol)
+    return None
+
+
+def search(board: List[List[Optional[str]]], player_symbol: str, deadline: float,
+           seed: int) -> Dict[Tuple[int, int, int, int], Tuple[int, float]]:
+    """
+    Runs UCT from `board` until `deadline` (time.monotonic()).
+
+    Returns:
+        (visits, wins) of every root move that was expanded.
+    """
+    rng = random.Random(seed)
+    table = get_move_table(len(board))
+    root = Node(board, player_symbol)
+
+    while time.monotonic() < deadline:
+        node = root
+        scratch = [row.copy() for row in board]
+
+        # Selection
+        while not node.untried and node.children:
+            node = node.select_child()
+            play(scratch, node.move, node.parent.player, table)
+
+        # Expansion
+        if node.untried:
+            move = node.untried.pop(rng.randrange(len(node.untried)))
+            winner = play(scratch, move, node.player, table)
+            child = Node(scratch, opponent(node.player), move, node, winner)
+            node.children.append(child)
+            node = child
+
+        # Simulation
+        result = node.winner if node.winner is not None else playout(scratch, node.player, rng, table)
+
+        # Backpropagation
+        while node is not None:
+            node.visits += 1
+            if node.parent is not None:
+                if result is None:
+                    node.wins += 0.5
+                elif result == node.parent.player:
+                    node.wins += 1.0
+            node = node.parent
+
+    return {child.move: (child.visits, child.wins) for child in root.children}
+
+
+def search_workers() -> int:
+    if SEARCH_WORKERS is not None:
+        return max(1, SEARCH_WORKERS)
+    return agent_search_workers()
+
+
+def _get_pool(workers: int) -> Optional[ProcessPoolExecutor]:
+    global _pool, _pool_unavailable
+    if _pool is None and not _pool_unavailable and workers > 1:
+        _pool = ProcessPoolExecutor(max_workers=workers - 1)
+    return _pool
+
+
+def _discard_pool() -> None:
+    global _pool, _pool_unavailable
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+    _pool_unavailable = True
+
+
+def parallel_search(board: List[List[Optional[str]]], player_symbol: str,
+                    deadline: float) -> Dict[Tuple[int, int, int, int], Tuple[int, float]]:
+    """
+    Root parallelism: every worker grows its own tree with its own seed until `deadline`,
+    then the root statistics are summed. Falls back to a single tree when helper processes
+    cannot be used (one CPU, or a daemonic host process).
+    """
+    base_seed = random.randrange(1 << 30)
+    workers = search_workers()
+    futures = []
+    pool = _get_pool(workers) if workers > 1 else None
+    if pool is not None:
+        try:
+            futures = [pool.submit(search, board, player_symbol, deadline, base_seed + worker)
+                       for worker in range(1, workers)]
+        except Exception:
+            _discard_pool()
+
+    merged = dict(search(board, player_symbol, deadline, base_seed))
+    if futures:
+        done, _ = wait(futures, timeout=max(deadline + MERGE_MARGIN - time.monotonic(), 0.0))
+        for future in done:
+            try:
+                stats = future.result()
+            except Exception:
+                _discard_pool()
+                continue
+            for move, (visits, wins) in stats.items():
+                total_visits, total_wins = merged.get(move, (0, 0.0))
+                merged[move] = (total_visits + visits, total_wins + wins)
+    return merged
+
+
+def agent_move(board: List[List[Optional[str]]], player_symbol: str) -> Tuple[int, int, int, int]:
+    start = time.monotonic()
+    table = get_move_table(len(board))
+
+    valid_moves = get_all_valid_moves(board, player_symbol)
+    if not valid_moves:
+        return 0, 0, 0, 0
+    if len(valid_moves) == 1:
+        return valid_moves[0]
+
+    # Fast win
+    for move in valid_moves:
+        if play([row.copy() for row in board], move, player_symbol, table) == player_symbol:
+            return move
+
+    deadline = start + TIME_LIMIT - SAFETY_MARGIN - MERGE_MARGIN
+    stats = parallel_search(board, player_symbol, deadline)
+    if not stats:
+        return valid_moves[0]
+    # The most visited move is the most robust choice
+    return max(stats, key=lambda move: stats[move][0])
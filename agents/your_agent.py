@@ -1,5 +1,8 @@
-from typing import List, Optional, Tuple
-from agent_utils import get_all_valid_moves
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from agent_utils import get_all_valid_moves, query_opening_book
+from move_tables import get_move_table
+from zobrist import get_zobrist_keys
+from tablebase import get_tablebase
 import time
 
 # Timing configuration
@@ -15,16 +18,285 @@ class TimeBudget:
         if time.monotonic() >= self.deadline:
             raise SearchTimeout()
 
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+# Nodes searched between two should_stop() calls while pondering
+PONDER_POLL_INTERVAL = 256
+
+class PonderBudget:
+    """
+    Stands in for TimeBudget while pondering: there is no deadline, the search stops
+    once should_stop() (polled every PONDER_POLL_INTERVAL checks) returns True.
+    """
+    def __init__(self, should_stop: Callable[[], bool]):
+        self.should_stop = should_stop
+        self.calls = 0
+        self.stopped = False
+
+    def check(self) -> None:
+        self.calls += 1
+        if self.stopped or (self.calls % PONDER_POLL_INTERVAL == 0 and self.should_stop()):
+            self.stopped = True
+            raise SearchTimeout()
+
+# Transposition table configuration
+TT_MAX_ENTRIES = 1 << 18
+
+TT_EXACT = 0
+TT_LOWER_BOUND = 1
+TT_UPPER_BOUND = 2
+
+class TranspositionTable:
+    """
+    Fixed-size hash table of searched positions. Each slot holds one entry
+    (key, depth, score, flag, best_move, generation); a slot is only overwritten by the
+    same position, by a search at least as deep (depth-preferred replacement) or when
+    its entry is left over from an earlier search (see new_search), so memory never
+    grows past `max_entries` slots.
+    """
+    def __init__(self, max_entries: int = TT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.slots: List[Optional[tuple]] = [None] * max_entries
+        self.generation = 0
+
+    def new_search(self) -> None:
+        # Older entries can still be probed, but no longer block replacement
+        self.generation += 1
+
+    def probe(self, key: int) -> Optional[tuple]:
+        entry = self.slots[key % self.max_entries]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key: int, depth: int, score: float, flag: int,
+              best_move: Optional[Tuple[int, int, int, int]]) -> None:
+        index = key % self.max_entries
+        entry = self.slots[index]
+        if entry is None or entry[0] == key or depth >= entry[1] or entry[5] != self.generation:
+            self.slots[index] = (key, depth, score, flag, best_move, self.generation)
+
+# One table per board size, kept between moves so pondering and earlier searches are reused
+_shared_tables: Dict[int, TranspositionTable] = {}
+
+def get_shared_tt(size: int) -> TranspositionTable:
+    tt = _shared_tables.get(size)
+    if tt is None:
+        tt = TranspositionTable()
+        _shared_tables[size] = tt
+    return tt
+
+# Move ordering configuration
+KILLER_SLOTS = 2
+
+class MoveOrderingTables:
+    """
+    What cutoffs taught the search so far, shared by all iterations of one move:
+    the last quiet moves that caused a cutoff at each ply (killers) and a history
+    score per (src, tgt) pair, raised by depth * depth for every cutoff it caused.
+    """
+    def __init__(self, max_ply: int):
+        self.killers: List[List[Tuple[int, int, int, int]]] = [[] for _ in range(max_ply + 1)]
+        self.history: Dict[Tuple[int, int, int, int], int] = {}
+
+    def record_cutoff(self, move: Tuple[int, int, int, int], ply: int, depth: int) -> None:
+        killers = self.killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[KILLER_SLOTS:]
+        self.history[move] = self.history.get(move, 0) + depth * depth
+
 class RootBest:
     def __init__(self, initial_move: Optional[Tuple[int, int, int, int]] = None):
         self.best_move: Optional[Tuple[int, int, int, int]] = initial_move
         self.best_score: float = float("-inf")
+        # Score (or alpha-beta bound) of every root move searched in this iteration
+        self.move_scores: Dict[Tuple[int, int, int, int], float] = {}
 
     def update_if_better(self, score: float, move: Tuple[int, int, int, int]) -> None:
+        self.move_scores[move] = score
         if score > self.best_score:
             self.best_score = score
             self.best_move = move
 
+# Iterative deepening configuration
+MAX_SEARCH_DEPTH = 64
+# Assumed growth of the next iteration's time when only one iteration has finished
+DEFAULT_BRANCHING_GROWTH = 4.0
+# Upper bound on the measured growth; iterations answered from a warm transposition
+# table (e.g. after pondering) are cheap and would otherwise inflate the ratio
+MAX_BRANCHING_GROWTH = 8.0
+
+# Evaluation configuration
+MAX_SCORE = 1000
+LINE_SCORE = 5
+# A win found `ply` plies below the root scores MATE_SCORE - ply, so nearer wins score
+# higher and slower losses score higher; every search score lies within +-SCORE_INFINITY
+MATE_SCORE = 100000
+MATE_THRESHOLD = MATE_SCORE - MAX_SEARCH_DEPTH - 1
+SCORE_INFINITY = MATE_SCORE + 1
+# Half-width of the first window around the previous iteration's score
+ASPIRATION_WINDOW = 2 * LINE_SCORE
+
+
+def is_mate_score(score: float) -> bool:
+    return abs(score) > MATE_THRESHOLD
+
+
+def score_to_tt(score: int, ply: int) -> int:
+    # Mate scores are stored as distance from the stored node, not from the root
+    if score > MATE_THRESHOLD:
+        return score + ply
+    if score < -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def score_from_tt(score: int, ply: int) -> int:
+    if score > MATE_THRESHOLD:
+        return score - ply
+    if score < -MATE_THRESHOLD:
+        return score + ply
+    return score
+
+class SearchBoard:
+    """
+    The board minimax searches, changed in place by make() and undone by unmake().
+
+    Per-line X/O counts (one packed code per line), the sum of the lines' heuristic terms
+    and the Zobrist key are updated for every cell a push changes, so evaluate() and
+    winner() cost O(1) unless a line is complete. evaluate() returns exactly what heuristic() returns for the board.
+    """
+    def __init__(self, board: List[List[Optional[str]]]):
+        self.size = size = len(board)
+        self.board = [row.copy() for row in board]
+        table = get_move_table(size)
+        self._paths: Dict[Tuple[int, int, int, int], List[tuple]] = {}
+        self._lines_through_cell = [table.lines_through_cell[(r, c)] for r in range(size) for c in range(size)]
+        self._keys = get_zobrist_keys(size)
+
+        # Each line's contents are one code, x_count + (size + 1) * o_count, so a cell change
+        # is one addition per line and the heuristic term of a line is a table lookup
+        self._code_delta = {None: 0, 'X': 1, 'O': size + 1}
+        code_count = (size + 1) * (size + 1)
+        self._code_terms = [0] * code_count
+        self._code_complete = [0] * code_count
+        self._code_winner: List[Optional[str]] = [None] * code_count
+        for x_count in range(size + 1):
+            for o_count in range(size + 1 - x_count):
+                code = x_count + (size + 1) * o_count
+                if x_count == size - 1:
+                    self._code_terms[code] = LINE_SCORE
+                elif o_count == size - 1:
+                    self._code_terms[code] = -LINE_SCORE
+                if x_count == size or o_count == size:
+                    self._code_complete[code] = 1
+                    self._code_winner[code] = 'X' if x_count == size else 'O'
+
+        self.line_codes = [0] * len(table.lines)
+        self.score_for_x = 0
+        self.complete_lines = 0
+        self.key = 0
+        self._undo: List[tuple] = []
+
+        for r in range(size):
+            for c in range(size):
+                symbol = self.board[r][c]
+                if symbol is not None:
+                    self.board[r][c] = None
+                    self._set_cell(r, c, symbol)
+
+    def _set_cell(self, r: int, c: int, symbol: Optional[str]) -> None:
+        previous = self.board[r][c]
+        self.board[r][c] = symbol
+        cell_idx = r * self.size + c
+        if previous is not None:
+            self.key ^= self._keys.cell_keys[previous][cell_idx]
+        if symbol is not None:
+            self.key ^= self._keys.cell_keys[symbol][cell_idx]
+
+        delta = self._code_delta[symbol] - self._code_delta[previous]
+        for line_idx in self._lines_through_cell[cell_idx]:
+            old_code = self.line_codes[line_idx]
+            new_code = old_code + delta
+            self.line_codes[line_idx] = new_code
+            self.score_for_x += self._code_terms[new_code] - self._code_terms[old_code]
+            self.complete_lines += self._code_complete[new_code] - self._code_complete[old_code]
+
+    def _path(self, move: Tuple[int, int, int, int]) -> List[tuple]:
+        # (r, c, flat index, lines through the cell) of every cell the push rewrites, target first
+        path = self._paths.get(move)
+        if path is None:
+            cells, _ = get_move_table(self.size).shift_path(*move)
+            path = [(r, c, r * self.size + c, self._lines_through_cell[r * self.size + c])
+                    for r, c in reversed(cells)]
+            self._paths[move] = path
+        return path
+
+    def make(self, move: Tuple[int, int, int, int], symbol: str) -> None:
+        path = self._path(move)
+        board = self.board
+        cell_keys, code_delta = self._keys.cell_keys, self._code_delta
+        line_codes, terms, complete = self.line_codes, self._code_terms, self._code_complete
+        key, score, complete_lines = self.key, self.score_for_x, self.complete_lines
+        # Restoring the few aggregates is cheaper than replaying the changes backwards
+        self._undo.append((path, [board[r][c] for r, c, _, _ in path], key, score, complete_lines, line_codes[:]))
+        incoming = symbol
+
+        # Same update as _set_cell, inlined because this is the hottest loop of the search
+        for r, c, cell_idx, line_indices in path:
+            previous = board[r][c]
+            if previous != incoming:
+                board[r][c] = incoming
+                if previous is not None:
+                    key ^= cell_keys[previous][cell_idx]
+                if incoming is not None:
+                    key ^= cell_keys[incoming][cell_idx]
+                delta = code_delta[incoming] - code_delta[previous]
+                for line_idx in line_indices:
+                    old_code = line_codes[line_idx]
+                    new_code = old_code + delta
+                    line_codes[line_idx] = new_code
+                    score += terms[new_code] - terms[old_code]
+                    complete_lines += complete[new_code] - complete[old_code]
+            incoming = previous
+
+        self.key, self.score_for_x, self.complete_lines = key, score, complete_lines
+
+    def unmake(self) -> None:
+        path, saved, self.key, self.score_for_x, self.complete_lines, self.line_codes = self._undo.pop()
+        board = self.board
+        for (r, c, _, _), symbol in zip(path, saved):
+            board[r][c] = symbol
+
+    def hash(self, symbol_to_move: str) -> int:
+        return self.key ^ self._keys.side_to_move_key(symbol_to_move)
+
+    def _first_complete_line(self) -> Optional[str]:
+        # Lines are in the order rows, columns, main diagonal, anti-diagonal, as in check_winner
+        for code in self.line_codes:
+            if self._code_complete[code]:
+                return self._code_winner[code]
+        return None
+
+    def winner(self) -> Optional[str]:
+        """
+        Same result as check_winner(self.board).
+        """
+        if not self.complete_lines:
+            return None
+        return self._first_complete_line()
+
+    def evaluate(self, player_symbol: str) -> int:
+        """
+        Same result as heuristic(self.board, player_symbol).
+        """
+        if self.complete_lines:
+            # heuristic() returns at the first complete line it meets
+            return MAX_SCORE if self._first_complete_line() == player_symbol else -MAX_SCORE
+        return self.score_for_x if player_symbol == 'X' else -self.score_for_x
+
 
 def agent_move(board: List[List[Optional[str]]], player_symbol: str) -> Tuple[int, int, int, int]:
 
@@ -41,6 +313,13 @@ def agent_move(board: List[List[Optional[str]]], player_symbol: str) -> Tuple[in
     if not valid_moves:
         return 0, 0, 0, 0
 
+    # Solved boards need no search
+    tablebase = get_tablebase(size)
+    if tablebase is not None:
+        tablebase_move = tablebase.best_move(board, player_symbol)
+        if tablebase_move is not None:
+            return tablebase_move
+
     # Fast win
     for move in valid_moves:
         budget.check()  # Check before simulating
@@ -48,38 +327,116 @@ def agent_move(board: List[List[Optional[str]]], player_symbol: str) -> Tuple[in
         if quick_check_winner(new_board, move[2], move[3], player_symbol, size):
             return move
 
-    if size == 3:
-        DEPTH = 6
-    elif size==4:
-        DEPTH = 4
-    else:
-        DEPTH = 3
+    # Known openings are answered from the book
+    book_move = query_opening_book(board, player_symbol)
+    if book_move is not None:
+        return book_move
+
+    tt = get_shared_tt(size)
+    tt.new_search()
+    ordering = MoveOrderingTables(MAX_SEARCH_DEPTH)
+    state = SearchBoard(board)
+    root_order = list(valid_moves)
 
-    # Root fallback
+    # Iterative deepening: only fully completed iterations may choose the move
+    completed_move: Optional[Tuple[int, int, int, int]] = None
+    completed_score: Optional[int] = None
     root_state = RootBest(initial_move=valid_moves[0])
+    previous_duration: Optional[float] = None
+    last_duration: Optional[float] = None
+
+    for depth in range(1, MAX_SEARCH_DEPTH + 1):
+        # Skip the next iteration if it is not expected to finish in time
+        if last_duration is not None:
+            if previous_duration is not None and previous_duration > 0:
+                growth = min(max(last_duration / previous_duration, 1.0), MAX_BRANCHING_GROWTH)
+            else:
+                growth = DEFAULT_BRANCHING_GROWTH
+            if last_duration * growth > budget.remaining():
+                break
 
-    try:
-        score, best_move = minimax(
-            board=board,
-            player_symbol=player_symbol,
-            depth=DEPTH,
-            alpha=float("-inf"),
-            beta=float("+inf"),
-            maximizing_player=True,
-            size=size,
-            budget=budget,
-            root_state=root_state,
-            is_root=True,
-        )
+        # Aspiration window around the last score; a side that fails is reopened fully
+        alpha, beta = -SCORE_INFINITY, SCORE_INFINITY
+        if completed_score is not None and not is_mate_score(completed_score):
+            alpha, beta = completed_score - ASPIRATION_WINDOW, completed_score + ASPIRATION_WINDOW
+
+        iteration_start = time.monotonic()
+        try:
+            while True:
+                root_state = RootBest(initial_move=root_order[0])
+                score, best_move = negamax(
+                    state=state,
+                    symbol=player_symbol,
+                    depth=depth,
+                    alpha=alpha,
+                    beta=beta,
+                    ply=0,
+                    budget=budget,
+                    root_state=root_state,
+                    tt=tt,
+                    root_order=root_order,
+                    ordering=ordering,
+                )
+                if score <= alpha:
+                    alpha = -SCORE_INFINITY
+                elif score >= beta:
+                    beta = SCORE_INFINITY
+                else:
+                    break
+        except SearchTimeout:
+            # Time is up, the unfinished iteration is discarded
+            break
+
+        previous_duration = last_duration
+        last_duration = time.monotonic() - iteration_start
+        completed_score = score
         if best_move is not None:
-            return best_move
-    except SearchTimeout:
-        # Time is up
-        pass
+            completed_move = best_move
+
+        # Next iteration starts with the best moves of this one
+        root_order.sort(key=lambda mv: root_state.move_scores.get(mv, -SCORE_INFINITY), reverse=True)
+
+        # Forced win or loss found, deeper search cannot change the outcome
+        if is_mate_score(score):
+            break
 
+    if completed_move is not None:
+        return completed_move
     return root_state.best_move if root_state.best_move is not None else valid_moves[0]
 
 
+def agent_ponder(board: List[List[Optional[str]]], player_symbol: str,
+                 should_stop: Callable[[], bool]) -> None:
+    """
+    Searches the opponent's position on `board` with iterative deepening until
+    should_stop() is True. The principal replies get the deepest searches, and their
+    results stay in the shared transposition table for the next agent_move call.
+    """
+    size = len(board)
+    other = opponent(player_symbol)
+    state = SearchBoard(board)
+    if state.winner() is not None:
+        return
+    root_order = get_all_valid_moves(board, other)
+    if not root_order:
+        return
+
+    tt = get_shared_tt(size)
+    tt.new_search()
+    ordering = MoveOrderingTables(MAX_SEARCH_DEPTH)
+    budget = PonderBudget(should_stop)
+    for depth in range(1, MAX_SEARCH_DEPTH + 1):
+        root_state = RootBest(initial_move=root_order[0])
+        try:
+            score, _ = negamax(state, other, depth, -SCORE_INFINITY, SCORE_INFINITY, 0, budget=budget,
+                               root_state=root_state, tt=tt, root_order=root_order, ordering=ordering)
+        except SearchTimeout:
+            return
+        root_order.sort(key=lambda mv: root_state.move_scores.get(mv, -SCORE_INFINITY), reverse=True)
+        if is_mate_score(score):
+            return
+
+
 
 def simulate(board, move, symbol):
 
@@ -146,16 +503,15 @@ def check_winner(board):
 
 def heuristic(board, player_symbol):
 
-    MAX_SCORE = 1000
     opp = 'O' if player_symbol == 'X' else 'X'
     size = len(board)
     score = 0
     x = size - 1
 
-    # Scoring rows
-    player_num = 0
-    opp_num = 0
+    # Scoring rows (counts are per line)
     for row in board:
+        player_num = 0
+        opp_num = 0
         for i in range(size):
             if row[i] == player_symbol:
                 player_num += 1
@@ -171,10 +527,10 @@ def heuristic(board, player_symbol):
         elif size == opp_num:
             return -MAX_SCORE
 
-    # Scoring columns
-    player_num = 0
-    opp_num = 0
+    # Scoring columns (counts are per line)
     for col in range(size):
+        player_num = 0
+        opp_num = 0
         for row in range(size):
             if board[row][col] == player_symbol:
                 player_num += 1
@@ -232,88 +588,165 @@ def opponent(player_symbol: str) -> str:
     return 'O' if player_symbol == 'X' else 'X'
 
 
-def minimax(
-    board: List[List[Optional[str]]],
-    player_symbol: str,
+def store_in_tt(
+    tt: Optional[TranspositionTable],
+    board_hash: int,
     depth: int,
-    alpha: float,
-    beta: float,
-    maximizing_player: bool,
-    size: int,
+    value: int,
+    alpha_orig: int,
+    beta: int,
+    best_move: Optional[Tuple[int, int, int, int]],
+    ply: int,
+) -> None:
+    if tt is None:
+        return
+    if value <= alpha_orig:
+        flag = TT_UPPER_BOUND
+    elif value >= beta:
+        flag = TT_LOWER_BOUND
+    else:
+        flag = TT_EXACT
+    tt.store(board_hash, depth, score_to_tt(value, ply), flag, best_move)
+
+
+def staged_moves(
+    state: SearchBoard,
+    moves: List[Tuple[int, int, int, int]],
+    symbol: str,
+    tt_move: Optional[Tuple[int, int, int, int]],
+    ordering: Optional[MoveOrderingTables] = None,
+    ply: int = 0,
+) -> Iterator[Tuple[int, int, int, int]]:
+    """
+    Yields a node's moves in search order, one stage at a time, so a cutoff in an early
+    stage skips the work of the later ones: the TT move (no scoring at all), then moves
+    that win on the spot, then the rest sorted by the evaluation of the child position
+    for `symbol`, the side making the move.
+    """
+    if tt_move is not None and tt_move in moves:
+        yield tt_move
+
+    winning_moves: List[Tuple[int, int, int, int]] = []
+    scored_moves: List[Tuple[int, Tuple[int, int, int, int]]] = []
+    for mv in moves:
+        if mv == tt_move:
+            continue
+        state.make(mv, symbol)
+        if state.winner() == symbol:
+            winning_moves.append(mv)
+        else:
+            scored_moves.append((state.evaluate(symbol), mv))
+        state.unmake()
+    yield from winning_moves
+
+    # The evaluation decides; the many ties it leaves are broken by what caused cutoffs
+    # elsewhere in the tree (history, then this ply's killers)
+    if ordering is None:
+        scored_moves.sort(key=lambda x: x[0], reverse=True)
+    else:
+        history, killers = ordering.history, ordering.killers[ply]
+        scored_moves.sort(key=lambda x: (x[0], history.get(x[1], 0), x[1] in killers), reverse=True)
+    for _, mv in scored_moves:
+        yield mv
+
+
+def negamax(
+    state: SearchBoard,
+    symbol: str,
+    depth: int,
+    alpha: int,
+    beta: int,
+    ply: int = 0,
     budget: Optional[TimeBudget] = None,
     root_state: Optional[RootBest] = None,
-    is_root: bool = False,
-) -> Tuple[float, Optional[Tuple[int, int, int, int]]]:
+    tt: Optional[TranspositionTable] = None,
+    root_order: Optional[List[Tuple[int, int, int, int]]] = None,
+    ordering: Optional[MoveOrderingTables] = None,
+) -> Tuple[int, Optional[Tuple[int, int, int, int]]]:
+    """
+    Principal variation search; scores are from the point of view of `symbol`, the side to
+    move. The first move of a node is searched with the full window and every later move
+    with a null window that only proves it is no better; a move that does beat alpha is
+    searched again with the full window. ply == 0 is the root, which searches `root_order`
+    and records every root move's score in `root_state`.
+    """
+    is_root = ply == 0
 
     # Time check at node entry
     if budget is not None:
         budget.check()
 
-    winner = check_winner(board)
-    if winner == player_symbol:
-        return float("+inf"), None
-    elif winner is not None and winner != player_symbol:
-        return float("-inf"), None
+    winner = state.winner()
+    if winner is not None:
+        return (MATE_SCORE - ply if winner == symbol else -(MATE_SCORE - ply)), None
     if depth == 0:
-        return heuristic(board, player_symbol), None
-
-
-    current_symbol = player_symbol if maximizing_player else opponent(player_symbol)
-    moves = get_all_valid_moves(board, current_symbol)
+        return state.evaluate(symbol), None
+
+    board_hash = state.hash(symbol)
+
+    # Transposition table lookup
+    alpha_orig = alpha
+    tt_move: Optional[Tuple[int, int, int, int]] = None
+    if tt is not None:
+        entry = tt.probe(board_hash)
+        if entry is not None:
+            _, entry_depth, entry_score, entry_flag, tt_move, _ = entry
+            if entry_depth >= depth and not is_root:
+                entry_score = score_from_tt(entry_score, ply)
+                if entry_flag == TT_EXACT:
+                    return entry_score, tt_move
+                elif entry_flag == TT_LOWER_BOUND:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if beta <= alpha:
+                    return entry_score, tt_move
+
+    moves = get_all_valid_moves(state.board, symbol)
     if not moves:
-        return heuristic(board, player_symbol), None
+        return state.evaluate(symbol), None
 
     # MOVE ORDERING
-    moves_boards_scores: List[Tuple[Tuple[int, int, int, int], List[List[Optional[str]]], float]] = []
-    for mv in moves:
-        child_board = simulate(board, mv, current_symbol)
-        score_for_order = heuristic(child_board, player_symbol)
-        moves_boards_scores.append((mv, child_board, score_for_order))
-
-    moves_boards_scores.sort(key=lambda x: x[2], reverse=maximizing_player)
+    if is_root and root_order is not None:
+        # The root keeps the order given by the previous iteration's scores
+        ordered_moves: Iterator[Tuple[int, int, int, int]] = iter(root_order)
+    else:
+        ordered_moves = staged_moves(state, moves, symbol, tt_move, ordering, ply)
 
-    # Main minimax loop
+    # Main search loop
+    other = opponent(symbol)
+    value = -SCORE_INFINITY
     best_move_local: Optional[Tuple[int, int, int, int]] = None
 
-    if maximizing_player:
-        value = float("-inf")
-        for mv, child_board, _ in moves_boards_scores:
-            if budget is not None:
-                budget.check()
-
-            child_score, _ = minimax(
-                child_board, player_symbol, depth - 1,
-                alpha, beta, False, size,
-                budget=budget, root_state=root_state, is_root=False
-            )
-
-            if child_score > value:
-                value = child_score
-                best_move_local = mv
-                if is_root and root_state is not None:
-                    root_state.update_if_better(child_score, mv)
-
-            alpha = max(alpha, value)
-            if beta <= alpha:
-                break
-        return value, best_move_local
-
-    else:
-        value = float("+inf")
-        for mv, child_board, _ in moves_boards_scores:
-            if budget is not None:
-                budget.check()
-
-            child_score, _ = minimax(
-                child_board, player_symbol, depth - 1,
-                alpha, beta, True, size,
-                budget=budget, root_state=root_state, is_root=False
-            )
-
-            if child_score < value:
-                value = child_score
-                best_move_local = mv
-            beta = min(beta, value)
-            if beta <= alpha:
-                break
-        return value, best_move_local
+    for move_number, mv in enumerate(ordered_moves):
+        if budget is not None:
+            budget.check()
+
+        state.make(mv, symbol)
+        try:
+            if move_number == 0:
+                child_score = -negamax(state, other, depth - 1, -beta, -alpha, ply + 1,
+                                       budget=budget, tt=tt, ordering=ordering)[0]
+            else:
+                child_score = -negamax(state, other, depth - 1, -alpha - 1, -alpha, ply + 1,
+                                       budget=budget, tt=tt, ordering=ordering)[0]
+                if alpha < child_score < beta:
+                    child_score = -negamax(state, other, depth - 1, -beta, -alpha, ply + 1,
+                                           budget=budget, tt=tt, ordering=ordering)[0]
+        finally:
+            state.unmake()
+
+        if is_root and root_state is not None:
+            root_state.update_if_better(child_score, mv)
+        if child_score > value:
+            value = child_score
+            best_move_local = mv
+
+        alpha = max(alpha, value)
+        if alpha >= beta:
+            if ordering is not None:
+                ordering.record_cutoff(mv, ply, depth)
+            break
+
+    store_in_tt(tt, board_hash, depth, value, alpha_orig, beta, best_move_local, ply)
+    return value, best_move_local
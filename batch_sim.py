@@ -0,0 +1,232 @@
+"""
+Vectorized random self-play: thousands of boards advanced in lockstep with NumPy.
+
+Boards are rows of an (N, size * size) int8 array (0 empty, 1 X, 2 O). At every turn each
+active game plays a move drawn uniformly from its legal moves, like agents/sample_agent.py.
+A game with no legal move passes, as an invalid agent move does in the main loop.
+
+Example:
+    python batch_sim.py --games 100000 --size 5 --seed 1 --verify 100
+"""
+import argparse
+import time
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+
+from agent_runtime import MAX_TURNS
+from game import XOShiftGame
+from move_tables import get_move_table
+
+CELL_CODES = {None: 0, 'X': 1, 'O': 2}
+CODE_SYMBOLS = {0: None, 1: 'X', 2: 'O'}
+PASS = -1
+
+
+class BatchTables:
+    """
+    Array form of MoveTable for one board size.
+
+    Attributes:
+        moves: (M, 4) array of (src_r, src_c, tgt_r, tgt_c), grouped by source in rim order.
+        rim_flat: (R,) flat indices of the rim cells.
+        move_rim: (M,) index into rim_flat of each move's source.
+        gather: (M, size * size) permutation applied to a flat board to perform a push;
+            the target cell is then overwritten with the mover's code.
+        move_target: (M,) flat index of each move's target.
+        lines: (L, size) flat indices of the win lines, in check_winner order.
+    """
+
+    def __init__(self, size: int):
+        table = get_move_table(size)
+        self.size = size
+        cell_count = size * size
+
+        self.rim_flat = np.array([r * size + c for r, c in table.rim_cells], dtype=np.intp)
+        moves: List[tuple] = []
+        move_rim: List[int] = []
+        for rim_idx, src in enumerate(table.rim_cells):
+            for move in table.moves_by_source[src]:
+                moves.append(move)
+                move_rim.append(rim_idx)
+        self.moves = np.array(moves, dtype=np.int8)
+        self.move_rim = np.array(move_rim, dtype=np.intp)
+
+        self.gather = np.tile(np.arange(cell_count, dtype=np.intp), (len(moves), 1))
+        self.move_target = np.empty(len(moves), dtype=np.intp)
+        for move_idx, move in enumerate(moves):
+            cells, _ = table.shift_path(*move)
+            flat = [r * size + c for r, c in cells]
+            for k in range(len(flat) - 1):
+                self.gather[move_idx, flat[k]] = flat[k + 1]
+            self.move_target[move_idx] = flat[-1]
+
+        self.lines = np.array([[r * size + c for r, c in coords] for coords in table.lines], dtype=np.intp)
+
+
+@lru_cache(maxsize=None)
+def get_batch_tables(size: int) -> BatchTables:
+    return BatchTables(size)
+
+
+class BatchResult:
+    """
+    Outcome of a batch: final boards, winner codes (0 draw, 1 X, 2 O), turns played per game
+    and, if recorded, the move index (into BatchTables.moves) or PASS for every turn.
+    """
+
+    def __init__(self, size: int, first_player: int, boards: np.ndarray, winners: np.ndarray,
+                 turns: np.ndarray, move_log: Optional[np.ndarray]):
+        self.size = size
+        self.first_player = first_player
+        self.boards = boards
+        self.winners = winners
+        self.turns = turns
+        self.move_log = move_log
+
+    def game_moves(self, game_idx: int) -> List[Optional[tuple]]:
+        """
+        Moves of one game as (src_r, src_c, tgt_r, tgt_c) tuples, None for a pass.
+        """
+        if self.move_log is None:
+            raise ValueError("Moves were not recorded for this batch.")
+        moves = get_batch_tables(self.size).moves
+        return [None if idx == PASS else tuple(int(v) for v in moves[idx])
+                for idx in self.move_log[game_idx, :self.turns[game_idx]]]
+
+
+def encode_board(board: List[List[Optional[str]]]) -> np.ndarray:
+    return np.array([CELL_CODES[cell] for row in board for cell in row], dtype=np.int8)
+
+
+def play_random(boards: np.ndarray, first_player: int = 1, max_turns: int = MAX_TURNS,
+                rng: Optional[np.random.Generator] = None, record_moves: bool = False) -> BatchResult:
+    """
+    Plays every board in `boards` (modified in place) to the end with uniformly random legal
+    moves. `first_player` is the code (1 X, 2 O) of the side to move in all boards. Games still
+    running after `max_turns` turns are draws.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    num_games, cell_count = boards.shape
+    size = int(round(cell_count ** 0.5))
+    tables = get_batch_tables(size)
+
+    active = np.ones(num_games, dtype=bool)
+    winners = np.zeros(num_games, dtype=np.int8)
+    turns = np.zeros(num_games, dtype=np.int32)
+    move_log = np.full((num_games, max_turns), PASS, dtype=np.int16) if record_moves else None
+
+    # Games that are already decided do not move
+    decided = _winner_codes(boards, tables)
+    winners[:] = decided
+    active &= decided == 0
+
+    player = first_player
+    for turn in range(max_turns):
+        playing = np.nonzero(active)[0]
+        if playing.size == 0:
+            break
+        turns[playing] += 1
+
+        rim = boards[playing][:, tables.rim_flat]
+        empty = rim == 0
+        selectable = np.where(empty.any(axis=1)[:, None], empty, rim == player)
+        legal = selectable[:, tables.move_rim]
+
+        # Uniform choice among legal moves: argmax of random keys, illegal moves masked out
+        keys = rng.random(legal.shape)
+        keys[~legal] = -1.0
+        chosen = keys.argmax(axis=1)
+        has_move = legal.any(axis=1)
+
+        movers = playing[has_move]
+        move_ids = chosen[has_move]
+        if movers.size:
+            pushed = np.take_along_axis(boards[movers], tables.gather[move_ids], axis=1)
+            pushed[np.arange(movers.size), tables.move_target[move_ids]] = player
+            boards[movers] = pushed
+            if move_log is not None:
+                move_log[movers, turn] = move_ids
+
+            new_winners = _winner_codes(pushed, tables)
+            won = new_winners > 0
+            winners[movers[won]] = new_winners[won]
+            active[movers[won]] = False
+
+        player = 3 - player
+
+    return BatchResult(size, first_player, boards, winners, turns, move_log)
+
+
+def _winner_codes(boards: np.ndarray, tables: BatchTables) -> np.ndarray:
+    # X is checked before O, as in XOShiftGame.check_winner
+    line_cells = boards[:, tables.lines]
+    x_wins = (line_cells == 1).all(axis=2).any(axis=1)
+    o_wins = (line_cells == 2).all(axis=2).any(axis=1)
+    return np.where(x_wins, 1, np.where(o_wins, 2, 0)).astype(np.int8)
+
+
+def simulate_random_games(num_games: int, size: int, seed: Optional[int] = None,
+                          max_turns: int = MAX_TURNS, record_moves: bool = False) -> BatchResult:
+    """
+    Plays `num_games` random games from the empty board with X to move.
+    """
+    boards = np.zeros((num_games, size * size), dtype=np.int8)
+    return play_random(boards, 1, max_turns, np.random.default_rng(seed), record_moves)
+
+
+def verify_with_engine(result: BatchResult, game_indices: List[int]) -> List[int]:
+    """
+    Replays recorded games through XOShiftGame (from the empty board) and returns the indices
+    whose final board or winner differ from the batch result.
+    """
+    mismatches = []
+    for game_idx in game_indices:
+        game = XOShiftGame(size=result.size)
+        game.current_player_index = result.first_player - 1
+        for move in result.game_moves(game_idx):
+            if move is not None and not game.apply_move(*move, game.current_player):
+                break
+            if game.winner:
+                break
+            game.switch_player()
+
+        expected_board = [[CODE_SYMBOLS[int(v)] for v in result.boards[game_idx, r * result.size:(r + 1) * result.size]]
+                          for r in range(result.size)]
+        expected_winner = CODE_SYMBOLS[int(result.winners[game_idx])]
+        if game.board != expected_board or game.winner != expected_winner:
+            mismatches.append(game_idx)
+    return mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Vectorized random XOShift self-play.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--size", type=int, default=5, choices=[3, 4, 5])
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-turns", type=int, default=MAX_TURNS)
+    parser.add_argument("--verify", type=int, default=0,
+                        help="replay this many games through XOShiftGame and compare")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = simulate_random_games(args.games, args.size, args.seed, args.max_turns,
+                                   record_moves=args.verify > 0)
+    elapsed = time.perf_counter() - start
+
+    moves_played = int(result.turns.sum())
+    print(f"{args.games} games on {args.size}x{args.size} in {elapsed:.2f}s "
+          f"({moves_played / elapsed:,.0f} moves/s)")
+    for code, label in ((1, "X wins"), (2, "O wins"), (0, "draws")):
+        count = int((result.winners == code).sum())
+        print(f"  {label}: {count} ({100.0 * count / args.games:.1f}%)")
+    print(f"  average game length: {result.turns.mean():.1f} turns")
+
+    if args.verify:
+        mismatches = verify_with_engine(result, list(range(min(args.verify, args.games))))
+        print(f"  engine check: {len(mismatches)} mismatches in {min(args.verify, args.games)} games")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Bitboard backend for XOShiftGame.
+
+Each player is one integer mask (cell (r, c) is bit r * size + c). Every legal push is
+precomputed once per board size, so applying a move is one dict lookup, a handful of integer
+operations and a check of the few win lines the push touched. The Zobrist hash and the
+list-of-lists board are derived from the masks only when they are read, through per-row
+lookup tables, so code that never reads them (random playouts, headless games) does not pay
+for them.
+"""
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from game import XOShiftGame
+from move_tables import get_move_table
+from zobrist import get_zobrist_keys
+
+# (source bit, target bit, bits kept outside the pushed span, bits that slide, slide distance
+#  (positive: towards higher bits), win lines the push touches as (mask, coords))
+MoveMasks = Tuple[int, int, int, int, int, List[Tuple[int, List[Tuple[int, int]]]]]
+
+
+class BoardMasks:
+    """
+    Precomputed bit masks for one board size. Cell (r, c) is bit r * size + c.
+
+    Attributes:
+        moves: Every legal (src_r, src_c, tgt_r, tgt_c) push mapped to its MoveMasks.
+        row_keys: row_keys[r][x_row | o_row << size] is the Zobrist key of the pieces of row r.
+        row_cells: row_cells[x_row | o_row << size] is the row as a tuple of cell values.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.full = (1 << (size * size)) - 1
+        self.row_mask = (1 << size) - 1
+        self.cell_bits = [[1 << (r * size + c) for c in range(size)] for r in range(size)]
+
+        self.rim = 0
+        for r in range(size):
+            for c in range(size):
+                if r == 0 or r == size - 1 or c == 0 or c == size - 1:
+                    self.rim |= self.cell_bits[r][c]
+
+        table = get_move_table(size)
+        self.lines: List[Tuple[int, List[Tuple[int, int]]]] = [
+            (self._mask_of(coords), coords) for coords in table.lines
+        ]
+        self._line_subsets: Dict[int, List[Tuple[int, List[Tuple[int, int]]]]] = {}
+        self._shifts: Dict[Tuple[int, int, int, int], Tuple[int, int, int]] = {}
+
+        self.moves: Dict[Tuple[int, int, int, int], MoveMasks] = {}
+        for move in table.moves:
+            line_mask = table.shift_path(*move)[1]
+            self.moves[move] = (self.cell_bits[move[0]][move[1]], self.cell_bits[move[2]][move[3]],
+                                *self.shift_masks(*move), self.lines_in(line_mask))
+
+        zobrist = get_zobrist_keys(size)
+        row_count = 1 << (2 * size)
+        self.row_keys: List[List[int]] = []
+        for r in range(size):
+            keys = [0] * row_count
+            for index in range(row_count):
+                key = 0
+                for c in range(size):
+                    if index >> c & 1:
+                        key ^= zobrist.cell_keys['X'][r * size + c]
+                    elif index >> (size + c) & 1:
+                        key ^= zobrist.cell_keys['O'][r * size + c]
+                keys[index] = key
+            self.row_keys.append(keys)
+        self.row_cells: List[Tuple[Optional[str], ...]] = [
+            tuple('X' if index >> c & 1 else 'O' if index >> (size + c) & 1 else None for c in range(size))
+            for index in range(row_count)
+        ]
+
+    def _mask_of(self, coords: List[Tuple[int, int]]) -> int:
+        mask = 0
+        for r, c in coords:
+            mask |= self.cell_bits[r][c]
+        return mask
+
+    def lines_in(self, line_mask: int) -> List[Tuple[int, List[Tuple[int, int]]]]:
+        """
+        Returns the entries of `lines` selected by `line_mask` (bit i = line i), in order.
+        """
+        subset = self._line_subsets.get(line_mask)
+        if subset is None:
+            subset = [line for line_idx, line in enumerate(self.lines) if line_mask >> line_idx & 1]
+            self._line_subsets[line_mask] = subset
+        return subset
+
+    def shift_masks(self, src_row: int, src_col: int, tgt_row: int, tgt_col: int) -> Tuple[int, int, int]:
+        """
+        Returns (keep, moving, delta) for a push from source to target along a row or column:
+        the bits outside the pushed span, the bits that slide one step, and the bit distance
+        they travel (positive: towards higher bits).
+        """
+        key = (src_row, src_col, tgt_row, tgt_col)
+        masks = self._shifts.get(key)
+        if masks is None:
+            if src_row == tgt_row:
+                step = 1
+                lo, hi = min(src_col, tgt_col), max(src_col, tgt_col)
+                span = self._mask_of([(src_row, c) for c in range(lo, hi + 1)])
+            else:
+                step = self.size
+                lo, hi = min(src_row, tgt_row), max(src_row, tgt_row)
+                span = self._mask_of([(r, src_col) for r in range(lo, hi + 1)])
+            src_bit = self.cell_bits[src_row][src_col]
+            tgt_bit = self.cell_bits[tgt_row][tgt_col]
+            masks = (self.full & ~span, span & ~src_bit, step if tgt_bit < src_bit else -step)
+            self._shifts[key] = masks
+        return masks
+
+    def row_indices(self, x_bits: int, o_bits: int) -> List[int]:
+        """
+        The index into row_keys / row_cells of every row, top to bottom.
+        """
+        size, row_mask = self.size, self.row_mask
+        return [(x_bits >> shift & row_mask) | (o_bits >> shift & row_mask) << size
+                for shift in range(0, size * size, size)]
+
+
+class ReadOnlyList(list):
+    """
+    List that refuses in-place changes; the board view of BitboardXOShiftGame is built from
+    these. Copies (row.copy(), row[:], copy.deepcopy, pickling) are ordinary lists.
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("The board of a BitboardXOShiftGame is read-only; assign a new board instead.")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+@lru_cache(maxsize=None)
+def get_board_masks(size: int) -> BoardMasks:
+    return BoardMasks(size)
+
+
+class BitboardXOShiftGame(XOShiftGame):
+    """
+    XOShiftGame backed by one integer bit mask per player.
+
+    Moves, selection checks and win checks work on the masks. `board` is still available as a
+    list-of-lists view for the UI and agents; it is rebuilt lazily and is read-only: writing
+    to it raises TypeError (assign a new board to `board` to replace the position).
+    """
+
+    def __init__(self, size: int = 5):
+        self._masks = get_board_masks(size) if 3 <= size <= 5 else None
+        self._x_bits = 0
+        self._o_bits = 0
+        self._board_view: Optional[List[List[Optional[str]]]] = None
+        self._hash_cache: Optional[int] = None
+        super().__init__(size)
+
+    @property
+    def board(self) -> List[List[Optional[str]]]:
+        if self._board_view is None:
+            row_cells = self._masks.row_cells
+            self._board_view = ReadOnlyList(ReadOnlyList(row_cells[index])
+                                            for index in self._masks.row_indices(self._x_bits, self._o_bits))
+        return self._board_view
+
+    @board.setter
+    def board(self, value: List[List[Optional[str]]]) -> None:
+        x_bits = o_bits = 0
+        for r, row in enumerate(value):
+            for c, cell in enumerate(row):
+                if cell == 'X':
+                    x_bits |= self._masks.cell_bits[r][c]
+                elif cell == 'O':
+                    o_bits |= self._masks.cell_bits[r][c]
+        self._x_bits, self._o_bits = x_bits, o_bits
+        self._board_view = None
+        self._hash_cache = None
+
+    @property
+    def _board_hash(self) -> int:
+        if self._hash_cache is None:
+            key = 0
+            for r, index in enumerate(self._masks.row_indices(self._x_bits, self._o_bits)):
+                key ^= self._masks.row_keys[r][index]
+            self._hash_cache = key
+        return self._hash_cache
+
+    def _cell(self, row: int, col: int) -> Optional[str]:
+        bit = self._masks.cell_bits[row][col]
+        if self._x_bits & bit:
+            return 'X'
+        if self._o_bits & bit:
+            return 'O'
+        return self.EMPTY
+
+    def is_valid_selection(self, row: int, col: int, player_symbol: str) -> bool:
+        masks = self._masks
+        bit = masks.cell_bits[row][col]
+        if not bit & masks.rim:
+            return False
+
+        occupied = self._x_bits | self._o_bits
+        if occupied & masks.rim != masks.rim:
+            return not occupied & bit
+        if player_symbol == 'X':
+            return bool(self._x_bits & bit)
+        if player_symbol == 'O':
+            return bool(self._o_bits & bit)
+        return False
+
+    def apply_move(self,
+                   src_row: int, src_col: int,
+                   tgt_row: int, tgt_col: int,
+                   player_symbol: str) -> bool:
+        # Same checks and result as XOShiftGame.apply_move, with every step table-driven
+        if self.winner:
+            return False
+        entry = self._masks.moves.get((src_row, src_col, tgt_row, tgt_col))
+        if entry is None:
+            return False
+        src_bit, tgt_bit, keep, moving, delta, lines = entry
+
+        x_bits, o_bits = self._x_bits, self._o_bits
+        rim = self._masks.rim
+        if (x_bits | o_bits) & rim != rim:
+            if (x_bits | o_bits) & src_bit:
+                return False
+        elif player_symbol == 'X':
+            if not x_bits & src_bit:
+                return False
+        elif player_symbol == 'O':
+            if not o_bits & src_bit:
+                return False
+        else:
+            return False
+
+        if delta > 0:
+            x_bits = (x_bits & keep) | (x_bits & moving) << delta
+            o_bits = (o_bits & keep) | (o_bits & moving) << delta
+        else:
+            x_bits = (x_bits & keep) | (x_bits & moving) >> -delta
+            o_bits = (o_bits & keep) | (o_bits & moving) >> -delta
+        if player_symbol == 'X':
+            x_bits |= tgt_bit
+        elif player_symbol == 'O':
+            o_bits |= tgt_bit
+        self._x_bits, self._o_bits = x_bits, o_bits
+        self._board_view = None
+        self._hash_cache = None
+        self.last_move = (src_row, src_col, tgt_row, tgt_col, player_symbol)
+
+        self.winner = None
+        self.winning_line_coords = None
+        for symbol, bits in (('X', x_bits), ('O', o_bits)):
+            for mask, coords in lines:
+                if bits & mask == mask:
+                    self.winner = symbol
+                    self.winning_line_coords = list(coords)
+                    return True
+        return True
+
+    def _rebuild_derived_state(self) -> None:
+        # Line occupancy is read straight from the masks and the hash is derived on demand.
+        self._hash_cache = None
+
+    def _shift(self, src_row: int, src_col: int, tgt_row: int, tgt_col: int,
+               symbol: Optional[str]) -> int:
+        # Only used by pop_move, whose reverse pushes need not be legal moves
+        keep, moving, delta = self._masks.shift_masks(src_row, src_col, tgt_row, tgt_col)
+        tgt_bit = self._masks.cell_bits[tgt_row][tgt_col]
+        x_bits, o_bits = self._x_bits, self._o_bits
+        if delta > 0:
+            x_bits = (x_bits & keep) | (x_bits & moving) << delta
+            o_bits = (o_bits & keep) | (o_bits & moving) << delta
+        else:
+            x_bits = (x_bits & keep) | (x_bits & moving) >> -delta
+            o_bits = (o_bits & keep) | (o_bits & moving) >> -delta
+        if symbol == 'X':
+            x_bits |= tgt_bit
+        elif symbol == 'O':
+            o_bits |= tgt_bit
+        self._x_bits, self._o_bits = x_bits, o_bits
+        self._board_view = None
+        self._hash_cache = None
+        return self._move_table.shift_path(src_row, src_col, tgt_row, tgt_col)[1]
+
+    def _check_lines(self, line_mask: int) -> None:
+        self.winner = None
+        self.winning_line_coords = None
+        lines = self._masks.lines_in(line_mask)
+        for symbol, bits in (('X', self._x_bits), ('O', self._o_bits)):
+            for mask, coords in lines:
+                if bits & mask == mask:
+                    self.winner = symbol
+                    self.winning_line_coords = list(coords)
+                    return
+
+    def check_winner(self) -> None:
+        self._check_lines((1 << len(self._masks.lines)) - 1)
+
+    def is_board_full(self) -> bool:
+        return self._x_bits | self._o_bits == self._masks.full
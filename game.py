@@ -1,5 +1,8 @@
 from typing import List, Optional, Tuple
 
+from move_tables import get_move_table
+from zobrist import get_zobrist_keys
+
 
 class XOShiftGame:
     """
@@ -12,13 +15,41 @@ class XOShiftGame:
         if not 3 <= size <= 5:
             raise ValueError("Board size must be between 3 and 5.")
         self.size = size
+        self._move_table = get_move_table(size)
+        self._zobrist = get_zobrist_keys(size)
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Clears the board and restores the initial game state.
+        """
         self.board: List[List[Optional[str]]] = [
-            [self.EMPTY for _ in range(size)] for _ in range(size)
+            [self.EMPTY for _ in range(self.size)] for _ in range(self.size)
         ]
         self.current_player_index = 0
         self.winner: Optional[str] = None
         self.last_move = None
         self.winning_line_coords: Optional[List[Tuple[int, int]]] = None  # Stores winning line
+        self._undo_stack: List[tuple] = []
+        self._rebuild_derived_state()
+
+    def _rebuild_derived_state(self) -> None:
+        # Pieces per player on every win line and the Zobrist key of the pieces,
+        # both kept up to date by _shift.
+        self._board_hash = self._zobrist.board_key(self.board)
+        self._line_counts = {symbol: [0] * len(self._move_table.lines) for symbol in self.PLAYERS}
+        for line_idx, coords in enumerate(self._move_table.lines):
+            for r, c in coords:
+                cell = self.board[r][c]
+                if cell in self._line_counts:
+                    self._line_counts[cell][line_idx] += 1
+
+    @property
+    def zobrist_hash(self) -> int:
+        """
+        64-bit Zobrist hash of the position, including the side to move.
+        """
+        return self._board_hash ^ self._zobrist.side_to_move_key(self.current_player)
 
     @property
     def current_player(self) -> str:
@@ -60,6 +91,53 @@ class XOShiftGame:
     def get_last_move(self):
         return self.last_move
 
+    def snapshot(self) -> tuple:
+        """
+        Immutable copy of the position (board, side to move, result, last move) for restore.
+        """
+        winning_line = tuple(self.winning_line_coords) if self.winning_line_coords else None
+        return (tuple(tuple(row) for row in self.board), self.current_player_index, self.winner,
+                winning_line, self.last_move)
+
+    def restore(self, snapshot: tuple) -> None:
+        """
+        Returns to a position taken with snapshot. The undo stack of push_move is cleared.
+        """
+        board, self.current_player_index, self.winner, winning_line, self.last_move = snapshot
+        self.board = [list(row) for row in board]
+        self.winning_line_coords = list(winning_line) if winning_line else None
+        self._undo_stack = []
+        self._rebuild_derived_state()
+
+    def _cell(self, row: int, col: int) -> Optional[str]:
+        return self.board[row][col]
+
+    def push_move(self, src_row: int, src_col: int, tgt_row: int, tgt_col: int) -> bool:
+        """
+        Applies a move for the current player in place and passes the turn unless the game
+        ended, like the main loop does. The move can be taken back exactly with pop_move.
+        Returns False (and changes nothing) if the move is invalid.
+        """
+        # (move, displaced source cell, winner, winning line, last move, player index)
+        record = (src_row, src_col, tgt_row, tgt_col, self._cell(src_row, src_col),
+                  self.winner, self.winning_line_coords, self.last_move, self.current_player_index)
+        if not self.apply_move(src_row, src_col, tgt_row, tgt_col, self.current_player):
+            return False
+        if not self.winner:
+            self.switch_player()
+        self._undo_stack.append(record)
+        return True
+
+    def pop_move(self) -> None:
+        """
+        Undoes the most recent push_move. Raises IndexError if there is nothing to undo.
+        """
+        (src_row, src_col, tgt_row, tgt_col, displaced,
+         self.winner, self.winning_line_coords, self.last_move,
+         self.current_player_index) = self._undo_stack.pop()
+        # Pushing back from the target restores every shifted piece; the source gets its old value.
+        self._shift(tgt_row, tgt_col, src_row, src_col, displaced)
+
     def apply_move(self,
                    src_row: int, src_col: int,
                    tgt_row: int, tgt_col: int,
@@ -72,62 +150,74 @@ class XOShiftGame:
         if not self.is_valid_target(src_row, src_col, tgt_row, tgt_col):
             return False
 
-        if src_row == tgt_row:
-            if tgt_col < src_col:
-                for col_idx in range(src_col, tgt_col, -1):
-                    self.board[src_row][col_idx] = self.board[src_row][col_idx - 1]
-            else:
-                for col_idx in range(src_col, tgt_col):
-                    self.board[src_row][col_idx] = self.board[src_row][col_idx + 1]
-        else:
-            if tgt_row < src_row:
-                for row_idx in range(src_row, tgt_row, -1):
-                    self.board[row_idx][src_col] = self.board[row_idx - 1][src_col]
-            else:
-                for row_idx in range(src_row, tgt_row):
-                    self.board[row_idx][src_col] = self.board[row_idx + 1][src_col]
-
-        self.board[tgt_row][tgt_col] = player_symbol
+        touched_lines = self._shift(src_row, src_col, tgt_row, tgt_col, player_symbol)
         self.last_move = (src_row, src_col, tgt_row, tgt_col, player_symbol)
-        self.check_winner()
+        self._check_lines(touched_lines)
         return True
 
-    def check_winner(self) -> None:
+    def _shift(self, src_row: int, src_col: int, tgt_row: int, tgt_col: int,
+               symbol: Optional[str]) -> int:
         """
-        Checks for a winner. If a winner is found, sets self.winner and self.winning_line_coords.
-        The win condition is N-in-a-row for an N-sized board.
+        Pushes the pieces between source and target one step towards the source
+        and places `symbol` on the target cell. No validation is performed.
+        Returns the mask of win lines (see MoveTable.lines) the push touched.
+        """
+        cells, touched_lines = self._move_table.shift_path(src_row, src_col, tgt_row, tgt_col)
+        board = self.board
+
+        incoming = symbol
+        for r, c in reversed(cells):
+            previous = board[r][c]
+            if previous != incoming:
+                board[r][c] = incoming
+                self._cell_changed(r, c, previous, incoming)
+            incoming = previous
+        return touched_lines
+
+    def _cell_changed(self, row: int, col: int, old: Optional[str], new: Optional[str]) -> None:
+        line_indices = self._move_table.lines_through_cell[(row, col)]
+        cell_idx = row * self.size + col
+        if old is not None:
+            self._board_hash ^= self._zobrist.cell_keys[old][cell_idx]
+            counts = self._line_counts[old]
+            for line_idx in line_indices:
+                counts[line_idx] -= 1
+        if new is not None:
+            self._board_hash ^= self._zobrist.cell_keys[new][cell_idx]
+            counts = self._line_counts[new]
+            for line_idx in line_indices:
+                counts[line_idx] += 1
+
+    def _check_lines(self, line_mask: int) -> None:
+        """
+        Win detection restricted to the lines in `line_mask`. Only valid when no line outside
+        the mask can be complete, which holds after a push from a position without a winner.
+        Reports the same winner and line as check_winner would.
         """
         self.winner = None
         self.winning_line_coords = None
         n = self.size
-        needed_to_win = n
 
         for symbol in self.PLAYERS:
-            # Check rows
-            for r in range(n):
-                if all(self.board[r][c] == symbol for c in range(n)):
-                    self.winner = symbol
-                    self.winning_line_coords = [(r, c) for c in range(n)]
-                    return
-
-            # Check columns
-            for c in range(n):
-                if all(self.board[r][c] == symbol for r in range(n)):
+            counts = self._line_counts[symbol]
+            remaining = line_mask
+            while remaining:
+                lowest = remaining & -remaining
+                line_idx = lowest.bit_length() - 1
+                if counts[line_idx] == n:
                     self.winner = symbol
-                    self.winning_line_coords = [(r, c) for r in range(n)]
+                    self.winning_line_coords = list(self._move_table.lines[line_idx])
                     return
+                remaining ^= lowest
 
-            # Check main diagonal (top-left to bottom-right)
-            if all(self.board[i][i] == symbol for i in range(n)):
-                self.winner = symbol
-                self.winning_line_coords = [(i, i) for i in range(n)]
-                return
-
-            # Check anti-diagonal (top-right to bottom-left)
-            if all(self.board[i][n - 1 - i] == symbol for i in range(n)):
-                self.winner = symbol
-                self.winning_line_coords = [(i, n - 1 - i) for i in range(n)]
-                return
+    def check_winner(self) -> None:
+        """
+        Checks for a winner. If a winner is found, sets self.winner and self.winning_line_coords.
+        The win condition is N-in-a-row for an N-sized board. Rescans the whole board, so it is
+        also safe to call after `board` was assigned directly.
+        """
+        self._rebuild_derived_state()
+        self._check_lines((1 << len(self._move_table.lines)) - 1)
 
     def is_board_full(self) -> bool:
         for r in range(self.size):
@@ -0,0 +1,254 @@
+"""
+Plays agent-vs-agent games without a display.
+
+Example:
+    python headless.py your_agent sample_agent --games 100 --size 5 --alternate-colors
+"""
+import argparse
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from agent_runtime import AGENT_TIME_LIMIT, MAX_TURNS, AgentWorker, limit_agent_search_workers, load_agent
+from bitboard import BitboardXOShiftGame
+from replay_io import (BINARY_REPLAY_EXTENSION, REPLAYS_DIR, build_replay_filename, build_replay_metadata,
+                       ensure_replays_dir, save_binary_replay, save_replay)
+
+
+def run_agent_in_process(agent_fn: Callable, board: List[List[Optional[str]]], player_symbol: str,
+                         time_limit: float = AGENT_TIME_LIMIT):
+    """
+    Calls the agent directly. Much cheaper than a process per move, but the time limit can
+    only be checked afterwards: a late answer is discarded and reported as a timeout.
+    Only use it with trusted agents that cannot hang.
+    """
+    board_copy = [[cell for cell in row] for row in board]
+    start = time.monotonic()
+    try:
+        move = agent_fn(board_copy, player_symbol)
+    except Exception as e:
+        return None, e, False
+    if time.monotonic() - start > time_limit:
+        return None, None, True
+    return move, None, False
+
+
+class InProcessAgent:
+    """
+    Same request() interface as AgentWorker, for run_agent_in_process.
+    """
+
+    def __init__(self, agent_filename: str):
+        self.agent_fn = load_agent(agent_filename)
+
+    def request(self, board: List[List[Optional[str]]], player_symbol: str,
+                time_limit: float = AGENT_TIME_LIMIT):
+        return run_agent_in_process(self.agent_fn, board, player_symbol, time_limit)
+
+    def ponder(self, board: List[List[Optional[str]]], player_symbol: str) -> None:
+        # Pondering needs a resident process that can be interrupted
+        pass
+
+    def stop_ponder(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def start_agent(agent_filename: str, in_process: bool = False):
+    """
+    Returns a started AgentWorker, or an InProcessAgent when `in_process` is set.
+    """
+    if in_process:
+        return InProcessAgent(agent_filename)
+    worker = AgentWorker(agent_filename)
+    worker.start()
+    return worker
+
+
+def play_game(agent_x, agent_o, board_size: int,
+              time_limit: float = AGENT_TIME_LIMIT, max_turns: int = MAX_TURNS,
+              ponder: bool = False) -> Dict[str, Any]:
+    """
+    Plays one game between two started agents (see start_agent) with the same rules as the main loop:
+    a crashing, timed-out or invalid agent loses its turn, and the game is a draw after
+    `max_turns` turns. Unlike the main loop, every turn counts towards `max_turns`, so two
+    crashing agents cannot loop forever. With `ponder`, an agent that has just moved keeps
+    thinking during the opponent's turn (both agents then share the CPU).
+
+    Returns:
+        A dict with the winner ('X', 'O' or 'Draw'), the recorded moves (replay format),
+        the number of turns and per-symbol timeout/crash/invalid-move counters.
+    """
+    agents = {'X': agent_x, 'O': agent_o}
+    game = BitboardXOShiftGame(size=board_size)
+    moves: List[Dict[str, Any]] = []
+    faults = {symbol: {"timeouts": 0, "crashes": 0, "invalid_moves": 0} for symbol in game.PLAYERS}
+    turn_count = 0
+
+    while not game.winner:
+        if turn_count >= max_turns:
+            game.winner = "Draw"
+            break
+
+        player = game.current_player
+        move, exception, timed_out = agents[player].request(game.board, player, time_limit)
+        turn_count += 1
+
+        if exception:
+            faults[player]["crashes"] += 1
+        elif timed_out:
+            faults[player]["timeouts"] += 1
+        elif move:
+            try:
+                sr, sc, tr, tc = move
+                applied = game.apply_move(sr, sc, tr, tc, player)
+            except (TypeError, ValueError, IndexError):
+                applied = False
+            if applied:
+                moves.append({"player": player, "src_r": sr, "src_c": sc, "tgt_r": tr, "tgt_c": tc})
+                if game.winner:
+                    break
+                if ponder:
+                    agents[player].ponder(game.board, player)
+            else:
+                faults[player]["invalid_moves"] += 1
+        else:
+            faults[player]["invalid_moves"] += 1
+        game.switch_player()
+
+    if ponder:
+        # The loser may still be thinking about a game that is over
+        for agent in agents.values():
+            agent.stop_ponder()
+    return {"winner": game.winner, "moves": moves, "turns": turn_count, "faults": faults}
+
+
+def save_game_replay(result: Dict[str, Any], agent_x: str, agent_o: str, board_size: int,
+                     replays_dir: str, suffix: str, binary: bool = False) -> str:
+    metadata = build_replay_metadata(board_size, "agent-agent", agent_x, agent_o, result["winner"])
+    if binary:
+        filename = build_replay_filename(board_size, "agent-agent", suffix=suffix, extension=BINARY_REPLAY_EXTENSION)
+        filepath = os.path.join(replays_dir, filename)
+        save_binary_replay(filepath, metadata, result["moves"])
+    else:
+        filepath = os.path.join(replays_dir, build_replay_filename(board_size, "agent-agent", suffix=suffix))
+        save_replay(filepath, metadata, result["moves"])
+    return filepath
+
+
+def match_labels(agent1: str, agent2: str):
+    """
+    Names used to report each side of a match; self-play gets numbered labels.
+    """
+    if agent1 == agent2:
+        return f"{agent1} (1)", f"{agent2} (2)"
+    return agent1, agent2
+
+
+def run_match(agent1: str, agent2: str, games: int, board_size: int,
+              time_limit: float = AGENT_TIME_LIMIT, max_turns: int = MAX_TURNS,
+              alternate_colors: bool = False, in_process: bool = False,
+              replays_dir: Optional[str] = REPLAYS_DIR, ponder: bool = False,
+              binary_replays: bool = False) -> Dict[str, Any]:
+    """
+    Plays `games` games between agent1 and agent2 and returns aggregate statistics.
+    agent1 plays X unless `alternate_colors` swaps the colors every other game.
+    Each agent is loaded once for the whole match. Replays are written to `replays_dir`
+    unless it is None, in the binary format if `binary_replays` is set. Agents get one search
+    process each unless AGENT_SEARCH_WORKERS_ENV is already set (see agent_runtime).
+    """
+    limit_agent_search_workers()
+    if replays_dir is not None:
+        ensure_replays_dir(replays_dir)
+
+    label1, label2 = match_labels(agent1, agent2)
+    stats: Dict[str, Any] = {
+        "games": 0, "draws": 0, "total_turns": 0,
+        "wins": {label1: 0, label2: 0},
+        "wins_by_color": {'X': 0, 'O': 0},
+        "faults": {label1: {"timeouts": 0, "crashes": 0, "invalid_moves": 0},
+                   label2: {"timeouts": 0, "crashes": 0, "invalid_moves": 0}},
+    }
+    start = time.monotonic()
+    runners = {label1: start_agent(agent1, in_process), label2: start_agent(agent2, in_process)}
+
+    try:
+        for game_idx in range(games):
+            swapped = alternate_colors and game_idx % 2 == 1
+            agent_x, agent_o = (agent2, agent1) if swapped else (agent1, agent2)
+            label_x, label_o = (label2, label1) if swapped else (label1, label2)
+            result = play_game(runners[label_x], runners[label_o], board_size, time_limit, max_turns, ponder)
+
+            stats["games"] += 1
+            stats["total_turns"] += result["turns"]
+            if result["winner"] == "Draw":
+                stats["draws"] += 1
+            else:
+                stats["wins_by_color"][result["winner"]] += 1
+                stats["wins"][label_x if result["winner"] == 'X' else label_o] += 1
+            for symbol, label in (('X', label_x), ('O', label_o)):
+                for key, count in result["faults"][symbol].items():
+                    stats["faults"][label][key] += count
+
+            if replays_dir is not None:
+                save_game_replay(result, agent_x, agent_o, board_size, replays_dir, suffix=f"{game_idx:05d}",
+                                 binary=binary_replays)
+    finally:
+        for runner in runners.values():
+            runner.close()
+
+    stats["elapsed_seconds"] = time.monotonic() - start
+    return stats
+
+
+def print_match_summary(agent1: str, agent2: str, board_size: int, stats: Dict[str, Any]) -> None:
+    games = stats["games"]
+    print(f"{agent1} vs {agent2} on {board_size}x{board_size}: {games} games "
+          f"in {stats['elapsed_seconds']:.1f}s")
+    for name in match_labels(agent1, agent2):
+        wins = stats["wins"][name]
+        rate = 100.0 * wins / games if games else 0.0
+        faults = stats["faults"][name]
+        print(f"  {name}: {wins} wins ({rate:.1f}%), {faults['timeouts']} timeouts, "
+              f"{faults['crashes']} crashes, {faults['invalid_moves']} invalid moves")
+    print(f"  draws: {stats['draws']}")
+    print(f"  wins by color: X {stats['wins_by_color']['X']}, O {stats['wins_by_color']['O']}")
+    if games:
+        print(f"  average game length: {stats['total_turns'] / games:.1f} turns")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Play agent-vs-agent XOShift games without a display.")
+    parser.add_argument("agent1", help="agent module in agents/, e.g. your_agent")
+    parser.add_argument("agent2", help="agent module in agents/, e.g. sample_agent")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--size", type=int, default=5, choices=[3, 4, 5])
+    parser.add_argument("--time-limit", type=float, default=AGENT_TIME_LIMIT)
+    parser.add_argument("--max-turns", type=int, default=MAX_TURNS)
+    parser.add_argument("--alternate-colors", action="store_true",
+                        help="swap X and O between the agents every other game")
+    parser.add_argument("--in-process", action="store_true",
+                        help="call agents directly instead of in a subprocess (trusted agents only)")
+    parser.add_argument("--replays-dir", default=REPLAYS_DIR)
+    parser.add_argument("--no-replays", action="store_true", help="do not write replay files")
+    parser.add_argument("--binary-replays", action="store_true", help="write compact binary replays")
+    parser.add_argument("--ponder", action="store_true",
+                        help="let agents that support it think during the opponent's turn")
+    parser.add_argument("--agent-search-workers", type=int, default=None,
+                        help="processes each agent's own search may use (default: 1)")
+    args = parser.parse_args()
+
+    limit_agent_search_workers(args.agent_search_workers)
+
+    stats = run_match(args.agent1, args.agent2, args.games, args.size,
+                      time_limit=args.time_limit, max_turns=args.max_turns,
+                      alternate_colors=args.alternate_colors, in_process=args.in_process,
+                      replays_dir=None if args.no_replays else args.replays_dir, ponder=args.ponder,
+                      binary_replays=args.binary_replays)
+    print_match_summary(args.agent1, args.agent2, args.size, stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+
+class MoveTable:
+    """
+    Static move-generation data for one board size, computed once and shared.
+
+    Attributes:
+        size: Board size N.
+        rim_cells: Rim coordinates in row-major order.
+        targets_by_source: For each rim cell, the cells it may be pushed to.
+        moves_by_source: For each rim cell, the full (src_r, src_c, tgt_r, tgt_c) moves.
+        moves: Every move on the board, grouped by source in rim order; a move's position
+            in this list (`move_index`) is its compact code (fits in one byte).
+        lines: Coordinates of every win line, in the order rows, columns,
+            main diagonal, anti-diagonal (the order XOShiftGame.check_winner uses).
+        lines_through_cell: For each cell, the indices into `lines` that contain it.
+        line_masks_by_cell: For each cell, a bit mask over `lines` (bit i = line i).
+        symmetries: The 8 symmetries of the square; symmetries[t][r * size + c] is the
+            image of (r, c) under transform t. Transform 0 is the identity.
+        symmetry_sources: symmetry_sources[t][j] is the flat index of the cell that
+            transform t moves to flat index j.
+        inverse_symmetry: inverse_symmetry[t] is the transform that undoes t.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        last = size - 1
+
+        self.rim_cells: List[Tuple[int, int]] = [
+            (r, c) for r in range(size) for c in range(size)
+            if r == 0 or r == last or c == 0 or c == last
+        ]
+
+        self.targets_by_source: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        self.moves_by_source: Dict[Tuple[int, int], List[Tuple[int, int, int, int]]] = {}
+        for sr, sc in self.rim_cells:
+            # Built through a set, exactly like the original generator, so move order is unchanged.
+            targets = set()
+            for tr, tc in ((sr, 0), (sr, last), (0, sc), (last, sc)):
+                if sr == tr and sc == tc:
+                    continue
+                targets.add((tr, tc))
+            self.targets_by_source[(sr, sc)] = list(targets)
+            self.moves_by_source[(sr, sc)] = [(sr, sc, tr, tc) for tr, tc in targets]
+
+        self.moves: List[Tuple[int, int, int, int]] = [
+            move for src in self.rim_cells for move in self.moves_by_source[src]
+        ]
+        self.move_index: Dict[Tuple[int, int, int, int], int] = {
+            move: code for code, move in enumerate(self.moves)
+        }
+
+        self.lines: List[List[Tuple[int, int]]] = []
+        self.lines += [[(r, c) for c in range(size)] for r in range(size)]
+        self.lines += [[(r, c) for r in range(size)] for c in range(size)]
+        self.lines.append([(i, i) for i in range(size)])
+        self.lines.append([(i, last - i) for i in range(size)])
+
+        self.lines_through_cell: Dict[Tuple[int, int], List[int]] = {
+            (r, c): [] for r in range(size) for c in range(size)
+        }
+        for line_idx, coords in enumerate(self.lines):
+            for cell in coords:
+                self.lines_through_cell[cell].append(line_idx)
+
+        self.line_masks_by_cell: Dict[Tuple[int, int], int] = {
+            cell: sum(1 << line_idx for line_idx in line_indices)
+            for cell, line_indices in self.lines_through_cell.items()
+        }
+
+        transforms = [
+            lambda r, c: (r, c),                    # identity
+            lambda r, c: (c, last - r),             # rotate 90
+            lambda r, c: (last - r, last - c),      # rotate 180
+            lambda r, c: (last - c, r),             # rotate 270
+            lambda r, c: (r, last - c),             # mirror left-right
+            lambda r, c: (last - r, c),             # mirror top-bottom
+            lambda r, c: (c, r),                    # transpose
+            lambda r, c: (last - c, last - r),      # anti-transpose
+        ]
+        self.symmetries: List[List[Tuple[int, int]]] = [
+            [transform(r, c) for r in range(size) for c in range(size)] for transform in transforms
+        ]
+        self.symmetry_sources: List[List[int]] = []
+        for images in self.symmetries:
+            sources = [0] * (size * size)
+            for flat_idx, (r, c) in enumerate(images):
+                sources[r * size + c] = flat_idx
+            self.symmetry_sources.append(sources)
+        self.inverse_symmetry: List[int] = [
+            self.symmetry_sources.index([r * size + c for r, c in images]) for images in self.symmetries
+        ]
+
+        self._shift_paths: Dict[Tuple[int, int, int, int], Tuple[List[Tuple[int, int]], int]] = {}
+
+    def shift_path(self, src_row: int, src_col: int,
+                   tgt_row: int, tgt_col: int) -> Tuple[List[Tuple[int, int]], int]:
+        """
+        Returns the cells a push from source to target rewrites, ordered from the source to
+        the target, together with the mask of the lines they lie on. Works for any two cells
+        sharing a row or column, not only legal moves (undoing a push needs the reverse path).
+        """
+        key = (src_row, src_col, tgt_row, tgt_col)
+        path = self._shift_paths.get(key)
+        if path is None:
+            if src_row == tgt_row:
+                step = 1 if tgt_col > src_col else -1
+                cells = [(src_row, c) for c in range(src_col, tgt_col + step, step)]
+            else:
+                step = 1 if tgt_row > src_row else -1
+                cells = [(r, src_col) for r in range(src_row, tgt_row + step, step)]
+            touched = 0
+            for cell in cells:
+                touched |= self.line_masks_by_cell[cell]
+            path = (cells, touched)
+            self._shift_paths[key] = path
+        return path
+
+
+@lru_cache(maxsize=None)
+def get_move_table(size: int) -> MoveTable:
+    """
+    Returns the shared MoveTable for the given board size.
+    """
+    return MoveTable(size)
+
+
+# Warm the tables for the supported board sizes at import time.
+for _size in (3, 4, 5):
+    get_move_table(_size)
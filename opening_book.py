@@ -0,0 +1,193 @@
+"""
+Opening book compiled from replay files.
+
+Every finished replay is re-played through XOShiftGame for its first plies. Each position is
+reduced to its canonical form (agent_utils.canonicalize_board), so symmetric openings share
+statistics, and the move played is recorded as its MoveTable code on the canonical board
+together with the result from the mover's point of view.
+
+File layout (little endian): a 16-byte header (magic, version, board size, record count)
+followed by fixed-size records (position key, move code, wins, draws, losses) sorted by key
+and move. The position key is the Zobrist hash of the canonical board with the side to move.
+Lookups binary-search the file through mmap, so opening a book costs nothing up front.
+
+Example:
+    python opening_book.py --replays-dir replays --sizes 3 4 5 --max-plies 12
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from agent_utils import canonicalize_board, get_board_hash, transform_move
+from game import XOShiftGame
+from move_tables import get_move_table
+from replay_io import REPLAYS_DIR, is_recorded_move_on_board, iter_replay_paths, load_replay
+
+OPENING_BOOK_DIR = "opening_books"
+OPENING_BOOK_MAGIC = b"XOBK"
+OPENING_BOOK_VERSION = 1
+HEADER_FORMAT = "<4sHHQ"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+RECORD_FORMAT = "<QBIII"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+DEFAULT_MAX_PLIES = 12
+
+# (position key, move code) -> [wins, draws, losses] for the player who made the move
+BookStats = Dict[Tuple[int, int], List[int]]
+
+
+def opening_book_path(size: int, book_dir: str = OPENING_BOOK_DIR) -> str:
+    return os.path.join(book_dir, f"xo_{size}x{size}.book")
+
+
+def add_replay_to_stats(stats: BookStats, size: int, metadata: dict, moves: List[dict],
+                        max_plies: int = DEFAULT_MAX_PLIES) -> bool:
+    """
+    Adds the first `max_plies` moves of one replay to `stats`. Replays of another size,
+    unfinished games and replays with an illegal move are skipped.
+
+    Returns:
+        True if the replay was used.
+    """
+    winner = metadata.get("winner")
+    if metadata.get("board_size") != size or winner not in ('X', 'O', "Draw"):
+        return False
+
+    move_index = get_move_table(size).move_index
+    game = XOShiftGame(size=size)
+    entries = []
+    for move_data in moves[:max_plies]:
+        player = move_data.get("player")
+        move = (move_data.get("src_r"), move_data.get("src_c"), move_data.get("tgt_r"), move_data.get("tgt_c"))
+        if player not in game.PLAYERS or not is_recorded_move_on_board(move, size):
+            return False
+
+        canonical_board, transform = canonicalize_board(game.board)
+        key = get_board_hash(canonical_board, player)
+        game.current_player_index = game.PLAYERS.index(player)
+        if not game.apply_move(*move, player):
+            return False
+        entries.append((key, move_index[transform_move(move, size, transform)], player))
+        if game.winner:
+            break
+        game.switch_player()
+
+    for key, code, player in entries:
+        counts = stats.setdefault((key, code), [0, 0, 0])
+        if winner == "Draw":
+            counts[1] += 1
+        elif winner == player:
+            counts[0] += 1
+        else:
+            counts[2] += 1
+    return True
+
+
+def collect_opening_stats(replay_paths: Iterable[str], size: int,
+                          max_plies: int = DEFAULT_MAX_PLIES) -> Tuple[BookStats, int]:
+    """
+    Streams the replays one file at a time; only the aggregated counts are kept in memory.
+
+    Returns:
+        (stats, number of replays used).
+    """
+    stats: BookStats = {}
+    used = 0
+    for path in replay_paths:
+        try:
+            metadata, moves = load_replay(path)
+            if add_replay_to_stats(stats, size, metadata, moves, max_plies):
+                used += 1
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            print(f"Skipping replay '{path}': {e}")
+        except (TypeError, AttributeError, KeyError, IndexError) as e:
+            # Valid JSON of the wrong shape, e.g. metadata that is not an object
+            print(f"Skipping replay '{path}': malformed replay ({type(e).__name__}: {e})")
+    return stats, used
+
+
+def write_opening_book(path: str, size: int, stats: BookStats) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(struct.pack(HEADER_FORMAT, OPENING_BOOK_MAGIC, OPENING_BOOK_VERSION, size, len(stats)))
+        for (key, code), (wins, draws, losses) in sorted(stats.items()):
+            f.write(struct.pack(RECORD_FORMAT, key, code, wins, draws, losses))
+
+
+class OpeningBook:
+    """
+    Read-only, memory-mapped view of a compiled opening book.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, self.record_count = struct.unpack_from(HEADER_FORMAT, self._mmap, 0)
+        if magic != OPENING_BOOK_MAGIC or version != OPENING_BOOK_VERSION:
+            raise ValueError(f"'{path}' is not a version {OPENING_BOOK_VERSION} opening book file.")
+
+    def _record(self, index: int) -> Tuple[int, int, int, int, int]:
+        return struct.unpack_from(RECORD_FORMAT, self._mmap, HEADER_SIZE + index * RECORD_SIZE)
+
+    def lookup(self, key: int) -> List[Tuple[int, int, int, int]]:
+        """
+        Returns (move code, wins, draws, losses) for every move recorded in the position.
+        """
+        low, high = 0, self.record_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._record(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        entries = []
+        while low < self.record_count:
+            record = self._record(low)
+            if record[0] != key:
+                break
+            entries.append(record[1:])
+            low += 1
+        return entries
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+@lru_cache(maxsize=None)
+def get_opening_book(size: int, book_dir: str = OPENING_BOOK_DIR) -> Optional[OpeningBook]:
+    """
+    Opens the book for `size` once per process; None if it has not been compiled.
+    """
+    path = opening_book_path(size, book_dir)
+    if not os.path.exists(path):
+        return None
+    return OpeningBook(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compile XOShift opening books from replay files.")
+    parser.add_argument("--replays-dir", default=REPLAYS_DIR)
+    parser.add_argument("--sizes", nargs="*", type=int, default=[3, 4, 5], choices=[3, 4, 5])
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES,
+                        help="number of opening moves of each game to record")
+    parser.add_argument("--output-dir", default=OPENING_BOOK_DIR)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        start = time.perf_counter()
+        stats, used = collect_opening_stats(iter_replay_paths(args.replays_dir), size, args.max_plies)
+        path = opening_book_path(size, args.output_dir)
+        write_opening_book(path, size, stats)
+        print(f"Wrote {path}: {len(stats)} entries from {used} replays "
+              f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
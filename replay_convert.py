@@ -0,0 +1,75 @@
+"""
+Converts replay files in bulk between JSON and the packed binary format (see replay_io).
+
+Example:
+    python replay_convert.py replays --to binary --output-dir replays_bin
+"""
+import argparse
+import os
+import time
+from typing import Dict, Optional
+
+from replay_io import (BINARY_REPLAY_EXTENSION, JSON_REPLAY_EXTENSION, REPLAYS_DIR, convert_replay,
+                       ensure_replays_dir, iter_replay_paths)
+
+FORMAT_EXTENSIONS = {"binary": BINARY_REPLAY_EXTENSION, "json": JSON_REPLAY_EXTENSION}
+
+
+def convert_replays(src_dir: str, to_format: str, dst_dir: Optional[str] = None,
+                    delete_source: bool = False) -> Dict[str, int]:
+    """
+    Converts every replay in `src_dir` that is not already in `to_format` ("binary" or
+    "json") and writes it under the same name with the new extension to `dst_dir`
+    (default: `src_dir`). Files that cannot be read are reported and skipped.
+
+    Returns:
+        Counts of converted, skipped and failed files, and the bytes read and written.
+    """
+    extension = FORMAT_EXTENSIONS[to_format]
+    dst_dir = dst_dir or src_dir
+    ensure_replays_dir(dst_dir)
+    stats = {"converted": 0, "skipped": 0, "failed": 0, "bytes_in": 0, "bytes_out": 0}
+
+    # Converting in place adds files to the directory being streamed; those are not counted
+    in_place = os.path.abspath(dst_dir) == os.path.abspath(src_dir)
+    written = set()
+    for src_path in iter_replay_paths(src_dir):
+        filename = os.path.basename(src_path)
+        if filename.endswith(extension):
+            if filename not in written:
+                stats["skipped"] += 1
+            continue
+        dst_path = os.path.join(dst_dir, os.path.splitext(filename)[0] + extension)
+        try:
+            convert_replay(src_path, dst_path)
+        except (OSError, ValueError, KeyError, IndexError) as e:
+            print(f"Could not convert '{src_path}': {e}")
+            stats["failed"] += 1
+            continue
+
+        if in_place:
+            written.add(os.path.basename(dst_path))
+        stats["converted"] += 1
+        stats["bytes_in"] += os.path.getsize(src_path)
+        stats["bytes_out"] += os.path.getsize(dst_path)
+        if delete_source:
+            os.remove(src_path)
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert XOShift replays between JSON and binary.")
+    parser.add_argument("src_dir", nargs="?", default=REPLAYS_DIR)
+    parser.add_argument("--to", choices=sorted(FORMAT_EXTENSIONS), default="binary")
+    parser.add_argument("--output-dir", default=None, help="default: next to the source files")
+    parser.add_argument("--delete-source", action="store_true", help="remove each file once it is converted")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = convert_replays(args.src_dir, args.to, args.output_dir, args.delete_source)
+    print(f"Converted {stats['converted']} replays ({stats['bytes_in']:,} -> {stats['bytes_out']:,} bytes) "
+          f"in {time.perf_counter() - start:.1f}s; {stats['skipped']} already {args.to}, {stats['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
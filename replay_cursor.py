@@ -0,0 +1,100 @@
+from typing import Any, Dict, List, Tuple
+
+from game import XOShiftGame
+
+# Autoplay speeds in plies per second, selectable while a replay is shown
+AUTOPLAY_SPEEDS: Tuple[float, ...] = (0.5, 1.0, 2.0, 4.0, 8.0)
+DEFAULT_AUTOPLAY_SPEED_INDEX = 2
+
+
+class ReplayCursor:
+    """
+    Position within a loaded replay. The moves are applied once, when the cursor is built, and
+    a snapshot of the game is kept for every ply, so seeking anywhere (forwards or backwards)
+    only restores one snapshot into `game`.
+
+    Moves that are incomplete or invalid are skipped with a warning, as before; their ply keeps
+    the previous position so ply numbers still match the move list.
+    """
+
+    def __init__(self, board_size: int, moves: List[Dict[str, Any]]):
+        self.game = XOShiftGame(size=board_size)
+        self.warnings: List[str] = []
+        self.snapshots = [self.game.snapshot()]
+        for i, move_data in enumerate(moves):
+            self._apply_recorded_move(i, move_data)
+            self.snapshots.append(self.game.snapshot())
+        for warning in self.warnings:
+            print(f"Replay Warning: {warning}")
+
+        self.ply = 0
+        self.autoplay = False
+        self.speed_index = DEFAULT_AUTOPLAY_SPEED_INDEX
+        self._autoplay_elapsed = 0.0
+        self.game.restore(self.snapshots[0])
+
+    def _apply_recorded_move(self, i: int, move_data: Dict[str, Any]) -> None:
+        game = self.game
+        p = move_data.get("player")
+        sr, sc, tr, tc = move_data.get("src_r"), move_data.get("src_c"), move_data.get("tgt_r"), move_data.get("tgt_c")
+        if None in [p, sr, sc, tr, tc]:
+            self.warnings.append(f"Move {i + 1} has incomplete data. Skipping.")
+            return
+        if p not in game.PLAYERS:
+            self.warnings.append(f"Player symbol '{p}' in move {i + 1} is invalid. Skipping move.")
+            return
+
+        # Ensure the correct player is set for the move
+        game.current_player_index = game.PLAYERS.index(p)
+        if not game.apply_move(sr, sc, tr, tc, p):
+            self.warnings.append(f"Move {i + 1} ({p}: ({sr},{sc})->({tr},{tc})) was invalid during replay application.")
+        if not game.winner:
+            game.switch_player()
+
+    @property
+    def length(self) -> int:
+        """
+        Number of moves in the replay; valid plies are 0..length.
+        """
+        return len(self.snapshots) - 1
+
+    @property
+    def at_end(self) -> bool:
+        return self.ply == self.length
+
+    @property
+    def autoplay_speed(self) -> float:
+        return AUTOPLAY_SPEEDS[self.speed_index]
+
+    def seek(self, ply: int) -> None:
+        """
+        Shows the position after `ply` moves, clamped to the replay.
+        """
+        self.ply = max(0, min(ply, self.length))
+        self.game.restore(self.snapshots[self.ply])
+
+    def step(self, delta: int = 1) -> None:
+        self.seek(self.ply + delta)
+
+    def toggle_autoplay(self) -> None:
+        self.autoplay = not self.autoplay
+        self._autoplay_elapsed = 0.0
+
+    def change_speed(self, delta: int) -> None:
+        self.speed_index = max(0, min(self.speed_index + delta, len(AUTOPLAY_SPEEDS) - 1))
+
+    def advance(self, elapsed_seconds: float) -> None:
+        """
+        Moves forward by the plies due after `elapsed_seconds` of autoplay. Autoplay stops
+        at the end of the replay.
+        """
+        if not self.autoplay:
+            return
+        self._autoplay_elapsed += elapsed_seconds
+        interval = 1.0 / self.autoplay_speed
+        plies = int(self._autoplay_elapsed / interval)
+        if plies:
+            self._autoplay_elapsed -= plies * interval
+            self.step(plies)
+        if self.at_end:
+            self.autoplay = False
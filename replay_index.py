@@ -0,0 +1,220 @@
+"""
+Persistent SQLite catalog of the replay files in a replays directory.
+
+The index lives next to the replays and keeps one row of metadata per file. A refresh only
+stats the directory; a file is opened again only when its mtime or size changed, so keeping
+the catalog current costs one scandir even for very large archives. Browsing (paging,
+filtering, sorting) is answered by SQL queries without touching the replay files.
+
+Example:
+    python replay_index.py --replays-dir replays --size 5 --winner X
+"""
+import argparse
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from replay_io import REPLAYS_DIR, is_replay_file, load_replay
+
+REPLAY_INDEX_FILENAME = "replay_index.sqlite3"
+REPLAY_INDEX_VERSION = 1
+# Rows written per transaction while refreshing
+REFRESH_BATCH_SIZE = 500
+
+SORT_ORDERS = {
+    "newest": "mtime_ns DESC, filename DESC",
+    "oldest": "mtime_ns ASC, filename ASC",
+    "name": "filename DESC",
+    "longest": "move_count DESC, filename DESC",
+    "shortest": "move_count ASC, filename DESC",
+}
+
+_COLUMNS = ("filename", "mtime_ns", "file_size", "board_size", "game_mode",
+            "player_x_type", "player_o_type", "winner", "move_count", "readable")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS replays (
+    filename TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    file_size INTEGER NOT NULL,
+    board_size INTEGER,
+    game_mode TEXT,
+    player_x_type TEXT,
+    player_o_type TEXT,
+    winner TEXT,
+    move_count INTEGER NOT NULL,
+    readable INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS replays_by_mtime ON replays (mtime_ns, filename);
+CREATE INDEX IF NOT EXISTS replays_by_size ON replays (board_size, mtime_ns);
+CREATE INDEX IF NOT EXISTS replays_by_winner ON replays (winner, mtime_ns);
+"""
+
+
+def replay_index_path(replays_dir: str = REPLAYS_DIR) -> str:
+    return os.path.join(replays_dir, REPLAY_INDEX_FILENAME)
+
+
+def read_replay_row(path: str, filename: str, mtime_ns: int, file_size: int) -> Tuple:
+    """
+    Builds the index row of one file. Unreadable files are indexed too (readable = 0),
+    so they are not parsed again until they change.
+    """
+    try:
+        metadata, moves = load_replay(path)
+        row = (filename, mtime_ns, file_size, metadata.get("board_size"), metadata.get("game_mode"),
+               metadata.get("player_x_type"), metadata.get("player_o_type"), metadata.get("winner"),
+               len(moves), 1)
+        if not all(value is None or isinstance(value, (int, str)) for value in row):
+            raise TypeError("metadata values must be numbers or strings")
+    except (OSError, ValueError, UnicodeDecodeError) as e:
+        print(f"Could not index replay '{filename}': {e}")
+        return filename, mtime_ns, file_size, None, None, None, None, None, 0, 0
+    except (TypeError, AttributeError, KeyError, IndexError) as e:
+        # Valid JSON of the wrong shape, e.g. metadata that is not an object
+        print(f"Could not index replay '{filename}': malformed replay ({type(e).__name__}: {e})")
+        return filename, mtime_ns, file_size, None, None, None, None, None, 0, 0
+    return row
+
+class ReplayIndex:
+    """
+    Catalog of one replays directory, stored in `<replays_dir>/replay_index.sqlite3`.
+    """
+
+    def __init__(self, replays_dir: str = REPLAYS_DIR, db_path: Optional[str] = None):
+        self.replays_dir = replays_dir
+        self.db_path = db_path or replay_index_path(replays_dir)
+        self._conn = sqlite3.connect(self.db_path)
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != REPLAY_INDEX_VERSION:
+            # Older layouts are simply rebuilt from the files
+            self._conn.execute("DROP TABLE IF EXISTS replays")
+            self._conn.execute(f"PRAGMA user_version = {REPLAY_INDEX_VERSION}")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        Brings the index in line with the directory: new and modified files are (re)read,
+        rows of deleted files are dropped.
+
+        Returns:
+            Counts of "added", "updated", "removed" and "unchanged" files.
+        """
+        known = {filename: (mtime_ns, file_size) for filename, mtime_ns, file_size
+                 in self._conn.execute("SELECT filename, mtime_ns, file_size FROM replays")}
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        pending: List[Tuple] = []
+
+        with os.scandir(self.replays_dir) as entries:
+            for entry in entries:
+                if not is_replay_file(entry.name) or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                previous = known.pop(entry.name, None)
+                if previous == (stat.st_mtime_ns, stat.st_size):
+                    stats["unchanged"] += 1
+                    continue
+                stats["added" if previous is None else "updated"] += 1
+                pending.append(read_replay_row(entry.path, entry.name, stat.st_mtime_ns, stat.st_size))
+                if len(pending) >= REFRESH_BATCH_SIZE:
+                    self._write_rows(pending)
+                    pending = []
+        self._write_rows(pending)
+
+        # Whatever is left in `known` is no longer on disk
+        if known:
+            self._conn.executemany("DELETE FROM replays WHERE filename = ?", ((name,) for name in known))
+            self._conn.commit()
+            stats["removed"] = len(known)
+        return stats
+
+    def _write_rows(self, rows: List[Tuple]) -> None:
+        if not rows:
+            return
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        self._conn.executemany(f"INSERT OR REPLACE INTO replays ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                               rows)
+        self._conn.commit()
+
+    @staticmethod
+    def _where(board_size: Optional[int], winner: Optional[str], player: Optional[str],
+               game_mode: Optional[str]) -> Tuple[str, List[Any]]:
+        clauses = ["readable = 1"]
+        params: List[Any] = []
+        if board_size is not None:
+            clauses.append("board_size = ?")
+            params.append(board_size)
+        if winner is not None:
+            clauses.append("winner = ?")
+            params.append(winner)
+        if player is not None:
+            clauses.append("(player_x_type = ? OR player_o_type = ?)")
+            params.extend([player, player])
+        if game_mode is not None:
+            clauses.append("game_mode = ?")
+            params.append(game_mode)
+        return " AND ".join(clauses), params
+
+    def count(self, board_size: Optional[int] = None, winner: Optional[str] = None,
+              player: Optional[str] = None, game_mode: Optional[str] = None) -> int:
+        where, params = self._where(board_size, winner, player, game_mode)
+        return self._conn.execute(f"SELECT COUNT(*) FROM replays WHERE {where}", params).fetchone()[0]
+
+    def query(self, board_size: Optional[int] = None, winner: Optional[str] = None,
+              player: Optional[str] = None, game_mode: Optional[str] = None, sort: str = "newest",
+              limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Returns the matching replays as dicts with the index columns, in the order named by
+        `sort` (a key of SORT_ORDERS). Filters left at None match everything.
+        """
+        if sort not in SORT_ORDERS:
+            raise ValueError(f"Unknown sort order '{sort}', expected one of {sorted(SORT_ORDERS)}.")
+        where, params = self._where(board_size, winner, player, game_mode)
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM replays WHERE {where} ORDER BY {SORT_ORDERS[sort]}"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
+        return [dict(zip(_COLUMNS, row)) for row in self._conn.execute(sql, params)]
+
+    def players(self) -> List[str]:
+        """
+        Every player type that appears in the index, for building filters.
+        """
+        rows = self._conn.execute("SELECT player_x_type FROM replays WHERE player_x_type IS NOT NULL "
+                                  "UNION SELECT player_o_type FROM replays WHERE player_o_type IS NOT NULL")
+        return sorted(row[0] for row in rows)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Refresh and query the replay index.")
+    parser.add_argument("--replays-dir", default=REPLAYS_DIR)
+    parser.add_argument("--size", type=int, default=None, choices=[3, 4, 5])
+    parser.add_argument("--winner", default=None, choices=["X", "O", "Draw"])
+    parser.add_argument("--player", default=None, help="player type on either side, e.g. an agent name")
+    parser.add_argument("--mode", default=None, help="game mode, e.g. agent-vs-agent")
+    parser.add_argument("--sort", default="newest", choices=sorted(SORT_ORDERS))
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    index = ReplayIndex(args.replays_dir)
+    start = time.perf_counter()
+    stats = index.refresh()
+    print(f"Refreshed {index.db_path} in {time.perf_counter() - start:.2f}s: "
+          f"{stats['added']} added, {stats['updated']} updated, {stats['removed']} removed, "
+          f"{stats['unchanged']} unchanged")
+
+    total = index.count(args.size, args.winner, args.player, args.mode)
+    print(f"{total} matching replays")
+    for row in index.query(args.size, args.winner, args.player, args.mode, args.sort, args.limit):
+        print(f"  {row['filename']}  {row['player_x_type']} vs {row['player_o_type']}  "
+              f"winner: {row['winner']}  moves: {row['move_count']}")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import datetime
+import json
+import os
+import struct
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from move_tables import get_move_table
+
+REPLAYS_DIR = "replays"
+JSON_REPLAY_EXTENSION = ".json"
+BINARY_REPLAY_EXTENSION = ".xrp"
+REPLAY_EXTENSIONS = (JSON_REPLAY_EXTENSION, BINARY_REPLAY_EXTENSION)
+
+# Binary replays (little endian): magic, version, board size, winner code, move count,
+# then game mode, X player and O player as length-prefixed UTF-8 strings, then one byte
+# per move: the MoveTable code of the move, with the high bit set when O made it.
+BINARY_REPLAY_MAGIC = b"XORP"
+BINARY_REPLAY_VERSION = 1
+BINARY_HEADER_FORMAT = "<4sBBBI"
+BINARY_HEADER_SIZE = struct.calcsize(BINARY_HEADER_FORMAT)
+WINNER_CODES = {None: 0, 'X': 1, 'O': 2, "Draw": 3}
+CODE_WINNERS = {code: winner for winner, code in WINNER_CODES.items()}
+O_MOVE_FLAG = 0x80
+
+
+def build_replay_filename(board_size: int, game_mode: str, suffix: Optional[str] = None,
+                          extension: str = JSON_REPLAY_EXTENSION) -> str:
+    """
+    Builds the standard replay file name, e.g. xo_5x5_A-A_20250812_193857.json.
+    `suffix` is appended to the timestamp to keep names unique when many games end
+    within the same second.
+    """
+    mode_str = game_mode.replace("human", "H").replace("agent", "A").replace("-vs-", "-")
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    if suffix:
+        timestamp = f"{timestamp}_{suffix}"
+    return f"xo_{board_size}x{board_size}_{mode_str}_{timestamp}{extension}"
+
+
+def build_replay_metadata(board_size: int, game_mode: str, player_x_type: str,
+                          player_o_type: str, winner: Optional[str]) -> Dict[str, Any]:
+    return {
+        "board_size": board_size,
+        "game_mode": game_mode,
+        "player_x_type": player_x_type,
+        "player_o_type": player_o_type,
+        "winner": winner
+    }
+
+
+def save_replay(filepath: str, metadata: Dict[str, Any], moves: List[Dict[str, Any]]) -> None:
+    replay_data = {"metadata": metadata, "moves": moves}
+    with open(filepath, "w") as f:
+        json.dump(replay_data, f, indent=4)
+
+
+def is_replay_file(filename: str) -> bool:
+    return filename.endswith(REPLAY_EXTENSIONS)
+
+
+def iter_replay_paths(replays_dir: str = REPLAYS_DIR) -> Iterator[str]:
+    """
+    Yields replay paths straight from the directory listing, in directory order, without
+    building a list, so archives of any size are streamed.
+    """
+    with os.scandir(replays_dir) as entries:
+        for entry in entries:
+            if is_replay_file(entry.name) and entry.is_file():
+                yield entry.path
+
+
+def is_recorded_move_on_board(move: Tuple[Any, ...], board_size: int) -> bool:
+    """
+    True if every coordinate is an int inside the board. Out-of-range values would raise in
+    XOShiftGame and negative ones would silently wrap around.
+    """
+    return all(type(v) is int and 0 <= v < board_size for v in move)
+
+
+def encode_binary_replay(metadata: Dict[str, Any], moves: List[Dict[str, Any]]) -> bytes:
+    """
+    Packs a replay into the binary format. Only the standard metadata keys
+    (see build_replay_metadata) are kept.
+    """
+    board_size = metadata.get("board_size")
+    if board_size is None:
+        raise ValueError("Binary replays need the board size in the metadata.")
+    move_index = get_move_table(board_size).move_index
+
+    move_bytes = bytearray()
+    for i, move_data in enumerate(moves):
+        move = (move_data.get("src_r"), move_data.get("src_c"), move_data.get("tgt_r"), move_data.get("tgt_c"))
+        code = move_index.get(move)
+        if code is None or move_data.get("player") not in ('X', 'O'):
+            raise ValueError(f"Move {i + 1} cannot be stored in a binary replay: {move_data}")
+        move_bytes.append(code | (O_MOVE_FLAG if move_data["player"] == 'O' else 0))
+
+    parts = [struct.pack(BINARY_HEADER_FORMAT, BINARY_REPLAY_MAGIC, BINARY_REPLAY_VERSION, board_size,
+                         WINNER_CODES.get(metadata.get("winner"), 0), len(moves))]
+    for key in ("game_mode", "player_x_type", "player_o_type"):
+        text = str(metadata.get(key) or "").encode("utf-8")[:255]
+        parts.append(bytes([len(text)]) + text)
+    parts.append(bytes(move_bytes))
+    return b"".join(parts)
+
+
+def decode_binary_replay(data: bytes) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    if len(data) < BINARY_HEADER_SIZE:
+        raise ValueError("Binary replay is truncated.")
+    magic, version, board_size, winner_code, move_count = struct.unpack_from(BINARY_HEADER_FORMAT, data, 0)
+    if magic != BINARY_REPLAY_MAGIC or version != BINARY_REPLAY_VERSION:
+        raise ValueError(f"Not a version {BINARY_REPLAY_VERSION} binary replay.")
+
+    offset = BINARY_HEADER_SIZE
+    texts = []
+    for _ in range(3):
+        if offset >= len(data):
+            raise ValueError("Binary replay is truncated.")
+        length = data[offset]
+        texts.append(data[offset + 1:offset + 1 + length].decode("utf-8"))
+        offset += 1 + length
+    metadata = build_replay_metadata(board_size, texts[0], texts[1], texts[2], CODE_WINNERS.get(winner_code))
+
+    move_bytes = data[offset:offset + move_count]
+    if len(move_bytes) != move_count:
+        raise ValueError("Binary replay is truncated.")
+    table_moves = get_move_table(board_size).moves
+    moves = []
+    for byte in move_bytes:
+        code = byte & ~O_MOVE_FLAG
+        if code >= len(table_moves):
+            raise ValueError(f"Binary replay has an invalid move code {code}.")
+        sr, sc, tr, tc = table_moves[code]
+        moves.append({"player": 'O' if byte & O_MOVE_FLAG else 'X',
+                      "src_r": sr, "src_c": sc, "tgt_r": tr, "tgt_c": tc})
+    return metadata, moves
+
+
+def save_binary_replay(filepath: str, metadata: Dict[str, Any], moves: List[Dict[str, Any]]) -> None:
+    with open(filepath, "wb") as f:
+        f.write(encode_binary_replay(metadata, moves))
+
+
+def load_replay(filepath: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Reads a JSON or binary replay file and returns (metadata, moves).
+    Old replays that are a bare list of moves get metadata built from the first move.
+    """
+    with open(filepath, "rb") as f:
+        data = f.read()
+    if data.startswith(BINARY_REPLAY_MAGIC):
+        return decode_binary_replay(data)
+
+    replay_data = json.loads(data)
+    if isinstance(replay_data, list):
+        moves = replay_data
+        metadata = {"board_size": moves[0].get("board_size")} if moves else {}
+    elif isinstance(replay_data, dict):
+        metadata = replay_data.get("metadata", {})
+        moves = replay_data.get("moves", [])
+    else:
+        raise ValueError("Replay file has invalid format.")
+    return metadata, moves
+
+
+def convert_replay(src_path: str, dst_path: str) -> None:
+    """
+    Converts one replay; the format written is chosen by the extension of `dst_path`.
+    """
+    metadata, moves = load_replay(src_path)
+    if dst_path.endswith(BINARY_REPLAY_EXTENSION):
+        save_binary_replay(dst_path, metadata, moves)
+    else:
+        save_replay(dst_path, metadata, moves)
+
+
+def ensure_replays_dir(replays_dir: str = REPLAYS_DIR) -> bool:
+    if os.path.exists(replays_dir):
+        return True
+    try:
+        os.makedirs(replays_dir)
+        print(f"Created directory: {replays_dir}")
+        return True
+    except OSError as e:
+        print(f"Error creating directory {replays_dir}: {e}. Replays may not save.")
+        return False
@@ -0,0 +1,264 @@
+"""
+Aggregate statistics over a replay archive, computed on a process pool.
+
+Every replay is re-simulated through XOShiftGame, so results and illegal moves come from the
+engine rather than from the recorded metadata. The directory is streamed in chunks of file
+names; each worker folds its chunk into a ReplayStats and only those small partial aggregates
+travel back, with a bounded number of chunks in flight, so memory stays flat however large
+the archive is.
+
+Outputs: win rates by agent, board size and colour; game-length distributions; win rates by
+first move; illegal-move counts by agent.
+
+Example:
+    python replay_stats.py --replays-dir replays --csv-dir stats --json stats/summary.json
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from game import XOShiftGame
+from replay_io import REPLAYS_DIR, is_recorded_move_on_board, iter_replay_paths, load_replay
+
+DEFAULT_CHUNK_SIZE = 256
+# Chunks submitted per worker ahead of the results being merged
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+RESULT_KEYS = ("wins", "draws", "losses")
+
+
+def iter_chunks(paths: Iterator[str], chunk_size: int) -> Iterator[List[str]]:
+    while True:
+        chunk = list(islice(paths, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def simulate_replay(board_size: int, moves: List[Dict[str, Any]]) -> Tuple[Optional[str], List[int]]:
+    """
+    Plays the recorded moves through XOShiftGame, each with the player it was recorded for.
+
+    Returns:
+        (engine winner or None, indices of the recorded moves that were illegal).
+    """
+    game = XOShiftGame(size=board_size)
+    illegal = []
+    for i, move_data in enumerate(moves):
+        player = move_data.get("player")
+        move = (move_data.get("src_r"), move_data.get("src_c"), move_data.get("tgt_r"), move_data.get("tgt_c"))
+        if player not in game.PLAYERS or not is_recorded_move_on_board(move, board_size):
+            illegal.append(i)
+            continue
+        game.current_player_index = game.PLAYERS.index(player)
+        if not game.apply_move(*move, player):
+            illegal.append(i)
+            continue
+        if not game.winner:
+            game.switch_player()
+    return game.winner, illegal
+
+
+class ReplayStats:
+    """
+    Additive aggregates over a set of replays; partial results are combined with merge.
+
+    Attributes:
+        by_agent: (agent, board size, colour) -> Counter of wins/draws/losses.
+        lengths: board size -> Counter of game length in moves.
+        first_moves: (board size, (sr, sc, tr, tc)) -> Counter of X/Draw/O results.
+        illegal_moves: agent -> number of recorded moves the engine rejected.
+        winner_mismatches: replays whose recorded winner differs from the engine's.
+    """
+
+    def __init__(self):
+        self.replays = 0
+        self.unreadable = 0
+        self.unfinished = 0
+        self.winner_mismatches = 0
+        self.by_agent: Dict[Tuple[str, int, str], Counter] = {}
+        self.lengths: Dict[int, Counter] = {}
+        self.first_moves: Dict[Tuple[int, Tuple[int, int, int, int]], Counter] = {}
+        self.illegal_moves: Counter = Counter()
+
+    def add_replay(self, metadata: Dict[str, Any], moves: List[Dict[str, Any]]) -> None:
+        board_size = metadata.get("board_size")
+        if board_size is None and moves:
+            board_size = moves[0].get("board_size")
+        if not isinstance(board_size, int) or not 3 <= board_size <= 5:
+            self.unreadable += 1
+            return
+
+        agents = {'X': metadata.get("player_x_type") or "unknown", 'O': metadata.get("player_o_type") or "unknown"}
+        winner, illegal = simulate_replay(board_size, moves)
+        self.replays += 1
+        for i in illegal:
+            self.illegal_moves[agents.get(moves[i].get("player"), "unknown")] += 1
+
+        recorded = metadata.get("winner")
+        if winner is None and recorded == "Draw":
+            # Games stopped at the turn limit end without a winner on the board
+            winner = "Draw"
+        if recorded is not None and recorded != winner:
+            self.winner_mismatches += 1
+        if winner is None:
+            self.unfinished += 1
+            return
+
+        self.lengths.setdefault(board_size, Counter())[len(moves)] += 1
+        for colour, agent in agents.items():
+            result = "draws" if winner == "Draw" else "wins" if winner == colour else "losses"
+            self.by_agent.setdefault((agent, board_size, colour), Counter())[result] += 1
+        if moves and 0 not in illegal:
+            first = moves[0]
+            first_move = (first["src_r"], first["src_c"], first["tgt_r"], first["tgt_c"])
+            self.first_moves.setdefault((board_size, first_move), Counter())[winner] += 1
+
+    def merge(self, other: "ReplayStats") -> None:
+        self.replays += other.replays
+        self.unreadable += other.unreadable
+        self.unfinished += other.unfinished
+        self.winner_mismatches += other.winner_mismatches
+        for target, source in ((self.by_agent, other.by_agent), (self.lengths, other.lengths),
+                               (self.first_moves, other.first_moves)):
+            for key, counts in source.items():
+                target.setdefault(key, Counter()).update(counts)
+        self.illegal_moves.update(other.illegal_moves)
+
+    def agent_rows(self) -> List[Dict[str, Any]]:
+        rows = []
+        for (agent, board_size, colour), counts in sorted(self.by_agent.items()):
+            games = sum(counts.values())
+            rows.append({"agent": agent, "board_size": board_size, "colour": colour, "games": games,
+                         **{key: counts[key] for key in RESULT_KEYS},
+                         "win_rate": round(counts["wins"] / games, 4)})
+        return rows
+
+    def length_rows(self) -> List[Dict[str, Any]]:
+        return [{"board_size": board_size, "moves": length, "games": games}
+                for board_size, counts in sorted(self.lengths.items())
+                for length, games in sorted(counts.items())]
+
+    def first_move_rows(self) -> List[Dict[str, Any]]:
+        rows = []
+        for (board_size, move), counts in sorted(self.first_moves.items()):
+            games = sum(counts.values())
+            rows.append({"board_size": board_size, "move": "{}{}-{}{}".format(*move), "games": games,
+                         "x_wins": counts['X'], "draws": counts["Draw"], "o_wins": counts['O'],
+                         "x_win_rate": round(counts['X'] / games, 4)})
+        return rows
+
+    def summary(self) -> Dict[str, Any]:
+        length_summary = {}
+        for board_size, counts in sorted(self.lengths.items()):
+            games = sum(counts.values())
+            lengths = sorted(counts)
+            seen = 0
+            median = lengths[-1]
+            for length in lengths:
+                seen += counts[length]
+                if 2 * seen > games:
+                    median = length
+                    break
+            length_summary[str(board_size)] = {
+                "games": games, "min": lengths[0], "max": lengths[-1],
+                "mean": round(sum(length * n for length, n in counts.items()) / games, 2), "median": median}
+        return {
+            "replays": self.replays,
+            "unreadable": self.unreadable,
+            "unfinished": self.unfinished,
+            "winner_mismatches": self.winner_mismatches,
+            "illegal_moves": dict(sorted(self.illegal_moves.items())),
+            "game_lengths": length_summary,
+            "agents": self.agent_rows(),
+            "first_moves": self.first_move_rows(),
+        }
+
+
+def analyze_chunk(paths: List[str]) -> ReplayStats:
+    stats = ReplayStats()
+    for path in paths:
+        try:
+            metadata, moves = load_replay(path)
+            # Malformed content, e.g. moves that are not objects, counts as unreadable
+            stats.add_replay(metadata, moves)
+        except (OSError, ValueError, UnicodeDecodeError, TypeError, AttributeError, KeyError, IndexError):
+            stats.unreadable += 1
+    return stats
+
+
+def collect_replay_stats(replays_dir: str = REPLAYS_DIR, workers: Optional[int] = None,
+                         chunk_size: int = DEFAULT_CHUNK_SIZE) -> ReplayStats:
+    """
+    Streams the directory through a pool of `workers` processes (default: CPU count).
+    At most CHUNKS_IN_FLIGHT_PER_WORKER chunks per worker are pending at any time.
+    """
+    workers = workers or os.cpu_count() or 1
+    total = ReplayStats()
+    chunks = iter_chunks(iter_replay_paths(replays_dir), chunk_size)
+    max_pending = workers * CHUNKS_IN_FLIGHT_PER_WORKER
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(analyze_chunk, chunk))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    total.merge(future.result())
+        for future in pending:
+            total.merge(future.result())
+    return total
+
+
+def write_csv(path: str, rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def write_reports(stats: ReplayStats, csv_dir: Optional[str], json_path: Optional[str]) -> None:
+    if csv_dir:
+        os.makedirs(csv_dir, exist_ok=True)
+        write_csv(os.path.join(csv_dir, "agents.csv"), stats.agent_rows())
+        write_csv(os.path.join(csv_dir, "game_lengths.csv"), stats.length_rows())
+        write_csv(os.path.join(csv_dir, "first_moves.csv"), stats.first_move_rows())
+    if json_path:
+        os.makedirs(os.path.dirname(json_path) or ".", exist_ok=True)
+        with open(json_path, "w") as f:
+            json.dump(stats.summary(), f, indent=4)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Aggregate statistics over XOShift replay files.")
+    parser.add_argument("--replays-dir", default=REPLAYS_DIR)
+    parser.add_argument("--workers", type=int, default=None, help="pool size (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="replays per work item")
+    parser.add_argument("--csv-dir", default=None, help="write agents.csv, game_lengths.csv and first_moves.csv here")
+    parser.add_argument("--json", default=None, help="write the full summary as JSON to this file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = collect_replay_stats(args.replays_dir, args.workers, args.chunk_size)
+    print(f"Analyzed {stats.replays} replays in {time.perf_counter() - start:.1f}s "
+          f"({stats.unreadable} unreadable, {stats.unfinished} unfinished, "
+          f"{stats.winner_mismatches} with a wrong recorded winner, "
+          f"{sum(stats.illegal_moves.values())} illegal moves)")
+    for row in stats.agent_rows():
+        print(f"  {row['board_size']}x{row['board_size']} {row['agent']} ({row['colour']}): "
+              f"{row['wins']}W {row['draws']}D {row['losses']}L in {row['games']} games, "
+              f"{100.0 * row['win_rate']:.1f}% wins")
+    write_reports(stats, args.csv_dir, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Bulk validation and deduplication of a replay archive.
+
+Every replay is re-simulated through XOShiftGame on a process pool: recorded moves the engine
+rejects and recorded winners the engine disagrees with are reported. Each game is also hashed
+(board size, players, winner and move sequence), so the same game stored under several names
+is found. Duplicates are grouped per file format: a JSON replay and its binary conversion are
+not duplicates of each other. Of each group the file with the smallest name (the oldest
+timestamp) is kept; the others can be replaced by hard links to it or deleted.
+
+Example:
+    python replay_validate.py --replays-dir replays --report problems.csv --dedupe hardlink
+"""
+import argparse
+import csv
+import hashlib
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+from replay_io import REPLAYS_DIR, iter_replay_paths, load_replay
+from replay_stats import CHUNKS_IN_FLIGHT_PER_WORKER, DEFAULT_CHUNK_SIZE, iter_chunks, simulate_replay
+
+DEDUPE_ACTIONS = ("report", "hardlink", "delete")
+
+# (filename, game digest or None if unreadable, problems found)
+ValidationResult = Tuple[str, Optional[bytes], List[str]]
+
+
+def game_digest(metadata: Dict[str, Any], moves: List[Dict[str, Any]]) -> bytes:
+    """
+    Hash of what makes two replays the same game: board size, player types, recorded winner
+    and the moves. The timestamp, file name and file format do not take part.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((metadata.get("board_size"), metadata.get("player_x_type"),
+                   metadata.get("player_o_type"), metadata.get("winner"))).encode("utf-8"))
+    for move_data in moves:
+        h.update(repr((move_data.get("player"), move_data.get("src_r"), move_data.get("src_c"),
+                       move_data.get("tgt_r"), move_data.get("tgt_c"))).encode("utf-8"))
+    return h.digest()
+
+
+def validate_replay(metadata: Dict[str, Any], moves: List[Dict[str, Any]]) -> List[str]:
+    """
+    Returns a description of every problem found; an empty list means the replay is valid.
+    """
+    board_size = metadata.get("board_size")
+    if not isinstance(board_size, int) or not 3 <= board_size <= 5:
+        return [f"invalid board size {board_size!r}"]
+
+    problems = []
+    winner, illegal = simulate_replay(board_size, moves)
+    for i in illegal:
+        problems.append(f"move {i + 1} is illegal: {moves[i]}")
+
+    recorded = metadata.get("winner")
+    # A draw by the turn limit and an unfinished game both leave no winner on the board
+    if recorded in ("Draw", None) and winner is None:
+        return problems
+    if recorded != winner:
+        problems.append(f"recorded winner {recorded!r}, engine winner {winner!r}")
+    return problems
+
+
+def validate_chunk(paths: List[str]) -> List[ValidationResult]:
+    results = []
+    for path in paths:
+        filename = os.path.basename(path)
+        try:
+            metadata, moves = load_replay(path)
+            results.append((filename, game_digest(metadata, moves), validate_replay(metadata, moves)))
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            results.append((filename, None, [f"unreadable: {e}"]))
+        except (TypeError, AttributeError, KeyError, IndexError) as e:
+            # Valid JSON of the wrong shape, e.g. moves that are not objects
+            results.append((filename, None, [f"unreadable: malformed replay ({type(e).__name__}: {e})"]))
+    return results
+
+
+def scan_replays(replays_dir: str = REPLAYS_DIR, workers: Optional[int] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[Dict[str, List[str]], List[Tuple[str, str]]]:
+    """
+    Validates and hashes every replay in `replays_dir` on a pool of `workers` processes.
+
+    Returns:
+        (filename -> problems for the invalid replays, (duplicate, kept file) pairs).
+    """
+    workers = workers or os.cpu_count() or 1
+    problems: Dict[str, List[str]] = {}
+    # Only one name per distinct game is held in memory while scanning
+    keepers: Dict[Tuple[bytes, str], str] = {}
+    # Every other file, with the (digest, extension) group it belongs to
+    repeated: List[Tuple[str, Tuple[bytes, str]]] = []
+
+    def merge(results: List[ValidationResult]) -> None:
+        for filename, digest, file_problems in results:
+            if file_problems:
+                problems[filename] = file_problems
+            if digest is None:
+                continue
+            group = (digest, os.path.splitext(filename)[1])
+            keeper = keepers.get(group)
+            if keeper is None:
+                keepers[group] = filename
+                continue
+            if filename < keeper:
+                keepers[group] = filename
+                filename = keeper
+            repeated.append((filename, group))
+
+    chunks = iter_chunks(iter_replay_paths(replays_dir), chunk_size)
+    max_pending = workers * CHUNKS_IN_FLIGHT_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(validate_chunk, chunk))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    merge(future.result())
+        for future in pending:
+            merge(future.result())
+
+    return problems, sorted((filename, keepers[group]) for filename, group in repeated)
+
+
+def dedupe_replays(replays_dir: str, duplicates: List[Tuple[str, str]], action: str) -> Dict[str, int]:
+    """
+    Replaces each duplicate with a hard link to the kept file, or deletes it.
+    """
+    stats = {"linked": 0, "deleted": 0, "skipped": 0}
+    if action == "report":
+        return stats
+
+    for duplicate, keeper in duplicates:
+        duplicate_path = os.path.join(replays_dir, duplicate)
+        keeper_path = os.path.join(replays_dir, keeper)
+        try:
+            if action == "delete":
+                os.remove(duplicate_path)
+                stats["deleted"] += 1
+                continue
+            if os.path.samefile(duplicate_path, keeper_path):
+                stats["skipped"] += 1
+                continue
+            # Link under a temporary name first so the duplicate is never missing
+            temp_path = duplicate_path + ".link"
+            os.link(keeper_path, temp_path)
+            os.replace(temp_path, duplicate_path)
+            stats["linked"] += 1
+        except OSError as e:
+            print(f"Could not {action} '{duplicate}': {e}")
+            stats["skipped"] += 1
+    return stats
+
+
+def write_report(path: str, problems: Dict[str, List[str]], duplicates: List[Tuple[str, str]]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["filename", "issue", "detail"])
+        for filename in sorted(problems):
+            for problem in problems[filename]:
+                writer.writerow([filename, "invalid", problem])
+        for duplicate, keeper in duplicates:
+            writer.writerow([duplicate, "duplicate", keeper])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Validate XOShift replays against the engine and find duplicates.")
+    parser.add_argument("--replays-dir", default=REPLAYS_DIR)
+    parser.add_argument("--workers", type=int, default=None, help="pool size (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="replays per work item")
+    parser.add_argument("--dedupe", default="report", choices=DEDUPE_ACTIONS,
+                        help="what to do with duplicate games (default: only report them)")
+    parser.add_argument("--report", default=None, help="write every invalid replay and duplicate to this CSV file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    problems, duplicates = scan_replays(args.replays_dir, args.workers, args.chunk_size)
+    print(f"Scanned {args.replays_dir} in {time.perf_counter() - start:.1f}s: "
+          f"{len(problems)} invalid replays, {len(duplicates)} duplicates")
+    for filename in sorted(problems)[:20]:
+        print(f"  {filename}: {'; '.join(problems[filename])}")
+    if len(problems) > 20:
+        print(f"  ... and {len(problems) - 20} more")
+
+    stats = dedupe_replays(args.replays_dir, duplicates, args.dedupe)
+    if args.dedupe != "report":
+        print(f"Duplicates: {stats['linked']} hard-linked, {stats['deleted']} deleted, {stats['skipped']} skipped")
+    if args.report:
+        write_report(args.report, problems, duplicates)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Retrograde-solved tablebases for small boards.
+
+Every board (a superset of the reachable ones) with either side to move is solved by
+retrograde analysis under the rules of agent_utils.get_possible_selections. A side without
+legal moves passes, as an agent returning an invalid move does in the main loop, and boards
+with a complete line are decided the way XOShiftGame.check_winner decides them (X first).
+
+File layout (little endian): a 16-byte header (magic, version, board size, board count)
+followed by one int16 per (side to move, board). Value 0 is a draw, +(d + 1) means the side
+to move wins in d plies and -(d + 1) that it loses in d plies. Lookups read the file through
+mmap, so probing is O(1) and nothing is loaded up front.
+
+Example:
+    python tablebase.py --size 3
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from agent_utils import get_all_valid_moves, push_on_board
+from move_tables import get_move_table
+
+TABLEBASE_DIR = "tablebases"
+TABLEBASE_MAGIC = b"XOTB"
+TABLEBASE_VERSION = 1
+HEADER_FORMAT = "<4sHHQ"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+CELL_DIGITS = {None: 0, 'X': 1, 'O': 2}
+SIDE_INDEX = {'X': 0, 'O': 1}
+
+
+def tablebase_path(size: int, tablebase_dir: str = TABLEBASE_DIR) -> str:
+    return os.path.join(tablebase_dir, f"xo_{size}x{size}.tb")
+
+
+def board_index(board: List[List[Optional[str]]]) -> int:
+    """
+    Base-3 index of a board: cell (r, c) is digit r * size + c (0 empty, 1 X, 2 O).
+    """
+    index = 0
+    weight = 1
+    for row in board:
+        for cell in row:
+            index += CELL_DIGITS[cell] * weight
+            weight *= 3
+    return index
+
+
+def decode_value(value: int) -> Tuple[str, int]:
+    if value > 0:
+        return "win", value - 1
+    if value < 0:
+        return "loss", -value - 1
+    return "draw", 0
+
+
+class Tablebase:
+    """
+    Read-only, memory-mapped view of a generated tablebase file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, self.board_count = struct.unpack_from(HEADER_FORMAT, self._mmap, 0)
+        if magic != TABLEBASE_MAGIC or version != TABLEBASE_VERSION:
+            raise ValueError(f"'{path}' is not a version {TABLEBASE_VERSION} tablebase file.")
+
+    def raw_value(self, board: List[List[Optional[str]]], player_symbol: str) -> int:
+        offset = HEADER_SIZE + 2 * (SIDE_INDEX[player_symbol] * self.board_count + board_index(board))
+        return struct.unpack_from("<h", self._mmap, offset)[0]
+
+    def probe(self, board: List[List[Optional[str]]], player_symbol: str) -> Tuple[str, int]:
+        """
+        Returns ("win" | "loss" | "draw", distance in plies) for the side to move.
+        """
+        return decode_value(self.raw_value(board, player_symbol))
+
+    def best_move(self, board: List[List[Optional[str]]],
+                  player_symbol: str) -> Optional[Tuple[int, int, int, int]]:
+        """
+        The fastest win, otherwise a drawing move, otherwise the slowest loss.
+        Returns None when the player has no legal move.
+        """
+        opponent = 'O' if player_symbol == 'X' else 'X'
+        best_move, best_rank = None, None
+        for move in get_all_valid_moves(board, player_symbol):
+            child = [row.copy() for row in board]
+            push_on_board(child, move, player_symbol)
+
+            # Value of the child is from the opponent's point of view
+            value = self.raw_value(child, opponent)
+            if value < 0:
+                rank = (2, value)          # we win; larger (less negative) value = faster win
+            elif value == 0:
+                rank = (1, 0)
+            else:
+                rank = (0, value)          # we lose; larger value = slower loss
+            if best_rank is None or rank > best_rank:
+                best_move, best_rank = move, rank
+        return best_move
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+@lru_cache(maxsize=None)
+def get_tablebase(size: int, tablebase_dir: str = TABLEBASE_DIR) -> Optional[Tablebase]:
+    """
+    Opens the tablebase for `size` once per process; None if it has not been generated.
+    """
+    path = tablebase_path(size, tablebase_dir)
+    if not os.path.exists(path):
+        return None
+    return Tablebase(path)
+
+
+def generate_tablebase(size: int, path: str, chunk_size: int = 1 << 18, verbose: bool = True) -> None:
+    """
+    Solves every board of the given size and writes the tablebase to `path`.
+
+    Values are found by Jacobi-style value iteration: each pass re-evaluates the unresolved
+    positions against the previous pass, so the first win found is the shortest one and a
+    loss is only recorded once every reply is a known opponent win. 3x3 takes seconds; 4x4
+    (3^16 boards, about 350 MB of working memory) is an overnight job.
+    """
+    # Only the generator needs NumPy
+    import numpy as np
+
+    table = get_move_table(size)
+    cell_count = size * size
+    board_count = 3 ** cell_count
+    powers = 3 ** np.arange(cell_count, dtype=np.int64)
+
+    moves = table.moves
+    rim_flat = np.array([r * size + c for r, c in table.rim_cells], dtype=np.intp)
+    move_src = np.array([move[0] * size + move[1] for move in moves], dtype=np.intp)
+    move_tgt = np.array([move[2] * size + move[3] for move in moves], dtype=np.intp)
+    gathers = []
+    for move in moves:
+        gather = np.arange(cell_count, dtype=np.intp)
+        cells, _ = table.shift_path(*move)
+        for k in range(len(cells) - 1):
+            gather[cells[k][0] * size + cells[k][1]] = cells[k + 1][0] * size + cells[k + 1][1]
+        gathers.append(gather)
+    lines = np.array([[r * size + c for r, c in coords] for coords in table.lines], dtype=np.intp)
+
+    def digits_of(start: int, stop: int) -> np.ndarray:
+        indices = np.arange(start, stop, dtype=np.int64)
+        return ((indices[:, None] // powers[None, :]) % 3).astype(np.int8)
+
+    # Terminal positions: X is checked before O, whoever is to move
+    values = np.zeros((2, board_count), dtype=np.int16)
+    terminal = np.zeros(board_count, dtype=bool)
+    for start in range(0, board_count, chunk_size):
+        stop = min(start + chunk_size, board_count)
+        line_cells = digits_of(start, stop)[:, lines]
+        x_wins = (line_cells == 1).all(axis=2).any(axis=1)
+        o_wins = ((line_cells == 2).all(axis=2).any(axis=1)) & ~x_wins
+        terminal[start:stop] = x_wins | o_wins
+        values[0, start:stop] = np.where(x_wins, 1, np.where(o_wins, -1, 0))
+        values[1, start:stop] = -values[0, start:stop]
+
+    iteration = 0
+    while True:
+        iteration += 1
+        previous = values.copy()
+        changed = 0
+        for start in range(0, board_count, chunk_size):
+            stop = min(start + chunk_size, board_count)
+            digits = digits_of(start, stop)
+            rim = digits[:, rim_flat]
+            rim_has_empty = (rim == 0).any(axis=1)
+
+            for side in (0, 1):
+                unresolved = (previous[side, start:stop] == 0) & ~terminal[start:stop]
+                if not unresolved.any():
+                    continue
+                code = side + 1
+                best_win = np.full(stop - start, np.iinfo(np.int16).max, dtype=np.int32)
+                all_replies_win = np.ones(stop - start, dtype=bool)
+                slowest_loss = np.zeros(stop - start, dtype=np.int32)
+                has_move = np.zeros(stop - start, dtype=bool)
+
+                for move_idx in range(len(moves)):
+                    src_digit = digits[:, move_src[move_idx]]
+                    legal = np.where(rim_has_empty, src_digit == 0, src_digit == code) & unresolved
+                    if not legal.any():
+                        continue
+                    child = digits[legal][:, gathers[move_idx]]
+                    child[:, move_tgt[move_idx]] = code
+                    reply = previous[1 - side, child.astype(np.int64) @ powers].astype(np.int32)
+
+                    rows = np.nonzero(legal)[0]
+                    has_move[rows] = True
+                    losing_reply = reply < 0
+                    best_win[rows[losing_reply]] = np.minimum(best_win[rows[losing_reply]], -reply[losing_reply])
+                    all_replies_win[rows[reply <= 0]] = False
+                    slowest_loss[rows] = np.maximum(slowest_loss[rows], reply)
+
+                # No legal move: the side passes to the same board
+                passing = unresolved & ~has_move
+                if passing.any():
+                    rows = np.nonzero(passing)[0]
+                    reply = previous[1 - side, start + rows].astype(np.int32)
+                    losing_reply = reply < 0
+                    best_win[rows[losing_reply]] = -reply[losing_reply]
+                    all_replies_win[rows[reply <= 0]] = False
+                    slowest_loss[rows] = reply
+
+                chunk_values = values[side, start:stop]
+                wins = unresolved & (best_win < np.iinfo(np.int16).max)
+                losses = unresolved & ~wins & all_replies_win
+                chunk_values[wins] = best_win[wins] + 1
+                chunk_values[losses] = -(slowest_loss[losses] + 1)
+                changed += int(wins.sum() + losses.sum())
+
+        if verbose:
+            print(f"iteration {iteration}: {changed} positions resolved")
+        if changed == 0:
+            break
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(struct.pack(HEADER_FORMAT, TABLEBASE_MAGIC, TABLEBASE_VERSION, size, board_count))
+        f.write(values.astype("<i2").tobytes())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate an XOShift endgame tablebase.")
+    parser.add_argument("--size", type=int, default=3, choices=[3, 4])
+    parser.add_argument("--output", default=None, help=f"default: {TABLEBASE_DIR}/xo_NxN.tb")
+    args = parser.parse_args()
+
+    path = args.output or tablebase_path(args.size)
+    start = time.perf_counter()
+    generate_tablebase(args.size, path)
+    print(f"Wrote {path} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import random
+from typing import List, Optional, Tuple
+
+import pytest
+
+from agent_utils import get_all_valid_moves, push_on_board
+from bitboard import BitboardXOShiftGame
+from game import XOShiftGame
+from zobrist import get_zobrist_keys
+
+ENGINES = [XOShiftGame, BitboardXOShiftGame]
+
+
+class ReferenceGame:
+    """
+    The original list-of-lists rules: a cell-by-cell shift and a full board scan for the
+    winner after every move, X before O.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.board: List[List[Optional[str]]] = [[None] * size for _ in range(size)]
+        self.winner: Optional[str] = None
+        self.winning_line_coords: Optional[List[Tuple[int, int]]] = None
+        self.last_move = None
+
+    def _on_rim(self, row: int, col: int) -> bool:
+        return row == 0 or row == self.size - 1 or col == 0 or col == self.size - 1
+
+    def apply_move(self, src_row: int, src_col: int, tgt_row: int, tgt_col: int, player_symbol: str) -> bool:
+        n = self.size
+        if self.winner or not self._on_rim(src_row, src_col):
+            return False
+        rim_has_empty = any(self.board[r][c] is None for r in range(n) for c in range(n) if self._on_rim(r, c))
+        if self.board[src_row][src_col] != (None if rim_has_empty else player_symbol):
+            return False
+        if (src_row, src_col) == (tgt_row, tgt_col):
+            return False
+        if not ((src_row == tgt_row and tgt_col in (0, n - 1)) or (src_col == tgt_col and tgt_row in (0, n - 1))):
+            return False
+
+        board = self.board
+        if src_row == tgt_row:
+            step = 1 if tgt_col > src_col else -1
+            for c in range(src_col, tgt_col, step):
+                board[src_row][c] = board[src_row][c + step]
+        else:
+            step = 1 if tgt_row > src_row else -1
+            for r in range(src_row, tgt_row, step):
+                board[r][src_col] = board[r + step][src_col]
+        board[tgt_row][tgt_col] = player_symbol
+        self.last_move = (src_row, src_col, tgt_row, tgt_col, player_symbol)
+
+        self.winner = None
+        self.winning_line_coords = None
+        lines = [[(r, c) for c in range(n)] for r in range(n)]
+        lines += [[(r, c) for r in range(n)] for c in range(n)]
+        lines += [[(i, i) for i in range(n)], [(i, n - 1 - i) for i in range(n)]]
+        for symbol in ('X', 'O'):
+            for coords in lines:
+                if all(board[r][c] == symbol for r, c in coords):
+                    self.winner = symbol
+                    self.winning_line_coords = coords
+                    return True
+        return True
+
+
+def random_move(rng: random.Random, size: int) -> Tuple[int, int, int, int]:
+    """
+    Any four coordinates on the board, so illegal moves are tried as often as legal ones.
+    """
+    last = size - 1
+    src_row, src_col = rng.randrange(size), rng.randrange(size)
+    if rng.random() < 0.5:
+        return src_row, src_col, src_row, rng.choice((0, last))
+    return src_row, src_col, rng.choice((0, last)), src_col
+
+
+def expected_hash(game: XOShiftGame) -> int:
+    keys = get_zobrist_keys(game.size)
+    return keys.board_key(game.board) ^ keys.side_to_move_key(game.current_player)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("size", [3, 4, 5])
+def test_random_games_match_reference_rules(engine, size):
+    rng = random.Random(size)
+    for _ in range(40):
+        game, reference = engine(size), ReferenceGame(size)
+        for _ in range(300):
+            player = game.current_player
+            move = random_move(rng, size)
+            applied = game.apply_move(*move, player)
+            assert applied == reference.apply_move(*move, player)
+            assert game.board == reference.board
+            assert game.winner == reference.winner
+            assert game.winning_line_coords == reference.winning_line_coords
+            assert game.last_move == reference.last_move
+            assert game.zobrist_hash == expected_hash(game)
+            if game.winner:
+                break
+            if applied:
+                game.switch_player()
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("size", [3, 4, 5])
+def test_pop_move_undoes_push_move(engine, size):
+    rng = random.Random(100 + size)
+    for _ in range(20):
+        game = engine(size)
+        history = []
+        while len(history) < 60 and not game.winner:
+            state = (game.snapshot(), game.zobrist_hash)
+            if game.push_move(*random_move(rng, size)):
+                history.append(state)
+                assert game.zobrist_hash == expected_hash(game)
+            else:
+                assert (game.snapshot(), game.zobrist_hash) == state
+
+        while history:
+            game.pop_move()
+            assert (game.snapshot(), game.zobrist_hash) == history.pop()
+        with pytest.raises(IndexError):
+            game.pop_move()
+
+
+@pytest.mark.parametrize("size", [3, 4, 5])
+def test_push_on_board_matches_apply_move(size):
+    rng = random.Random(200 + size)
+    for _ in range(20):
+        game = XOShiftGame(size)
+        while not game.winner:
+            player = game.current_player
+            move = rng.choice(get_all_valid_moves(game.board, player))
+            board = [row.copy() for row in game.board]
+            line_mask = push_on_board(board, move, player)
+            assert line_mask == game._move_table.shift_path(*move)[1]
+            assert game.apply_move(*move, player)
+            assert board == game.board
+            if not game.winner:
+                game.switch_player()
+
+
+def test_bitboard_board_view_is_read_only():
+    game = BitboardXOShiftGame(3)
+    assert game.apply_move(0, 0, 0, 2, 'X')
+    with pytest.raises(TypeError):
+        game.board[0][0] = 'O'
+    with pytest.raises(TypeError):
+        game.board[1] = ['O', 'O', 'O']
+    assert game.board == [[None, None, 'X'], [None] * 3, [None] * 3]
+
+    # Copies are ordinary lists, and assigning a board replaces the position
+    board = [row.copy() for row in game.board]
+    board[1] = ['O', 'O', 'O']
+    board[1][1] = 'X'
+    game.board = board
+    game.check_winner()
+    assert game.board == board
+    assert game.zobrist_hash == expected_hash(game)
@@ -0,0 +1,29 @@
+import json
+
+from opening_book import collect_opening_stats
+from replay_io import build_replay_metadata, iter_replay_paths, save_replay
+
+FIRST_MOVE = {"player": 'X', "src_r": 0, "src_c": 0, "tgt_r": 0, "tgt_c": 2}
+
+
+def test_malformed_replays_are_skipped(tmp_path, capsys):
+    metadata = build_replay_metadata(3, "agent-vs-agent", "a", "b", 'X')
+    save_replay(str(tmp_path / "good.json"), metadata, [FIRST_MOVE])
+    malformed = {
+        "metadata_list.json": {"metadata": [], "moves": []},
+        "bare_numbers.json": [1, 2],
+        "moves_number.json": {"metadata": metadata, "moves": 5},
+        "move_list.json": {"metadata": metadata, "moves": [[0, 0, 0, 2]]},
+    }
+    for filename, content in malformed.items():
+        (tmp_path / filename).write_text(json.dumps(content))
+    # Coordinates that are not ints on the board make the replay unusable, not the compile fail
+    for filename, value in (("float.json", 0.0), ("negative.json", -1), ("outside.json", 3), ("text.json", "0")):
+        save_replay(str(tmp_path / filename), metadata, [dict(FIRST_MOVE, src_r=value)])
+
+    stats, used = collect_opening_stats(iter_replay_paths(str(tmp_path)), 3)
+    assert used == 1
+    assert sum(sum(counts) for counts in stats.values()) == 1
+    output = capsys.readouterr().out
+    for filename in malformed:
+        assert filename in output
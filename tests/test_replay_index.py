@@ -0,0 +1,32 @@
+import json
+
+from replay_index import ReplayIndex
+from replay_io import build_replay_metadata, save_replay
+
+MALFORMED_REPLAYS = {
+    "metadata_list.json": {"metadata": [], "moves": []},
+    "bare_numbers.json": [1, 2],
+    "moves_number.json": {"metadata": {"board_size": 3}, "moves": 5},
+    "metadata_nested.json": {"metadata": {"board_size": [3], "winner": {"X": 1}}, "moves": []},
+    "scalar.json": 7,
+}
+
+
+def test_refresh_indexes_malformed_replays_as_unreadable(tmp_path):
+    save_replay(str(tmp_path / "good.json"), build_replay_metadata(3, "agent-vs-agent", "a", "b", 'X'),
+                [{"player": 'X', "src_r": 0, "src_c": 0, "tgt_r": 0, "tgt_c": 2}])
+    for filename, content in MALFORMED_REPLAYS.items():
+        (tmp_path / filename).write_text(json.dumps(content))
+    (tmp_path / "truncated.json").write_text('{"metadata": ')
+
+    index = ReplayIndex(str(tmp_path))
+    try:
+        stats = index.refresh()
+        assert stats["added"] == len(MALFORMED_REPLAYS) + 2
+        assert [row["filename"] for row in index.query()] == ["good.json"]
+        unreadable = index._conn.execute("SELECT COUNT(*) FROM replays WHERE readable = 0").fetchone()[0]
+        assert unreadable == len(MALFORMED_REPLAYS) + 1
+        # Unchanged unreadable files are not parsed again
+        assert index.refresh()["unchanged"] == len(MALFORMED_REPLAYS) + 2
+    finally:
+        index.close()
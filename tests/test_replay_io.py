@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from agent_utils import get_all_valid_moves
+from game import XOShiftGame
+from move_tables import get_move_table
+from replay_io import (BINARY_HEADER_SIZE, BINARY_REPLAY_MAGIC, O_MOVE_FLAG, build_replay_metadata,
+                       convert_replay, decode_binary_replay, encode_binary_replay, load_replay,
+                       save_binary_replay, save_replay)
+
+
+def random_replay(size: int, seed: int):
+    """
+    A finished (or turn-limited) game of random legal moves, as the main loop records it.
+    """
+    rng = random.Random(seed)
+    game = XOShiftGame(size)
+    moves = []
+    while not game.winner and len(moves) < 200:
+        player = game.current_player
+        move = rng.choice(get_all_valid_moves(game.board, player))
+        assert game.apply_move(*move, player)
+        moves.append({"player": player, "src_r": move[0], "src_c": move[1], "tgt_r": move[2], "tgt_c": move[3]})
+        if not game.winner:
+            game.switch_player()
+    metadata = build_replay_metadata(size, "agent-vs-agent", "mcts_agent", "random_agent", game.winner or "Draw")
+    return metadata, moves
+
+
+@pytest.mark.parametrize("size", [3, 4, 5])
+def test_binary_replay_round_trip(tmp_path, size):
+    metadata, moves = random_replay(size, seed=size)
+    path = str(tmp_path / "game.xrp")
+    save_binary_replay(path, metadata, moves)
+
+    data = (tmp_path / "game.xrp").read_bytes()
+    assert data.startswith(BINARY_REPLAY_MAGIC)
+    assert len(data) == BINARY_HEADER_SIZE + sum(1 + len(metadata[key]) for key in
+                                                 ("game_mode", "player_x_type", "player_o_type")) + len(moves)
+    assert load_replay(path) == (metadata, moves)
+
+
+def test_binary_replay_move_bytes_carry_the_o_bit(tmp_path):
+    table = get_move_table(3)
+    moves = [{"player": 'X', "src_r": 0, "src_c": 0, "tgt_r": 0, "tgt_c": 2},
+             {"player": 'O', "src_r": 0, "src_c": 0, "tgt_r": 2, "tgt_c": 0}]
+    path = str(tmp_path / "game.xrp")
+    save_binary_replay(path, build_replay_metadata(3, "human-vs-human", "human", "human", None), moves)
+
+    move_bytes = (tmp_path / "game.xrp").read_bytes()[-2:]
+    assert move_bytes[0] == table.move_index[(0, 0, 0, 2)]
+    assert move_bytes[1] == table.move_index[(0, 0, 2, 0)] | O_MOVE_FLAG
+    assert load_replay(path)[1] == moves
+
+
+def test_json_and_binary_conversions_agree(tmp_path):
+    metadata, moves = random_replay(4, seed=7)
+    json_path = str(tmp_path / "game.json")
+    save_replay(json_path, metadata, moves)
+
+    convert_replay(json_path, str(tmp_path / "game.xrp"))
+    convert_replay(str(tmp_path / "game.xrp"), str(tmp_path / "back.json"))
+    assert load_replay(str(tmp_path / "game.xrp")) == (metadata, moves)
+    assert load_replay(str(tmp_path / "back.json")) == (metadata, moves)
+
+
+def test_decode_rejects_bad_magic_and_truncation():
+    metadata, moves = random_replay(3, seed=1)
+    data = encode_binary_replay(metadata, moves)
+
+    with pytest.raises(ValueError):
+        decode_binary_replay(b"XORQ" + data[4:])
+    with pytest.raises(ValueError):
+        decode_binary_replay(data[:-1])
+    with pytest.raises(ValueError):
+        decode_binary_replay(data[:BINARY_HEADER_SIZE - 1])
@@ -0,0 +1,214 @@
+"""
+Round-robin tournament between every agent in agents/, run on a process pool.
+
+Example:
+    python tournament.py --sizes 3 4 5 --games-per-pairing 2
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import permutations
+from multiprocessing import util
+from typing import Any, Dict, List, Optional, Tuple
+
+from agent_runtime import AGENT_TIME_LIMIT, MAX_TURNS, limit_agent_search_workers
+from headless import play_game, save_game_replay, start_agent
+from replay_io import REPLAYS_DIR, ensure_replays_dir
+
+AGENTS_DIR = "agents"
+ELO_INITIAL = 1500.0
+ELO_K_FACTOR = 32.0
+
+# Agents started inside each pool process, reused by every game that process plays
+_pool_agents: Dict[str, Any] = {}
+
+
+def discover_agents(agents_dir: str = AGENTS_DIR) -> List[str]:
+    """
+    Returns the module names of all agents in `agents_dir`, skipping __init__ and
+    files starting with an underscore.
+    """
+    names = []
+    for filename in os.listdir(agents_dir):
+        if filename.endswith(".py") and not filename.startswith("_"):
+            names.append(filename[:-3])
+    return sorted(names)
+
+
+def check_agents(agents: List[str], in_process: bool = False) -> List[str]:
+    """
+    Starts every agent once and returns those that load. The others (import errors, no
+    agent_move, too slow to start) are reported and left out of the tournament.
+    """
+    loadable = []
+    for agent_name in agents:
+        try:
+            start_agent(agent_name, in_process).close()
+        except Exception as e:
+            print(f"Skipping agent '{agent_name}': {e}")
+            continue
+        loadable.append(agent_name)
+    return loadable
+
+
+def build_schedule(agents: List[str], sizes: List[int], games_per_pairing: int) -> List[Tuple[int, str, str, int]]:
+    """
+    Every ordered pair of distinct agents (so both color assignments) on every size,
+    `games_per_pairing` times. Entries are (index, agent_x, agent_o, board_size).
+    """
+    schedule = []
+    for board_size in sizes:
+        for agent_x, agent_o in permutations(agents, 2):
+            for _ in range(games_per_pairing):
+                schedule.append((len(schedule), agent_x, agent_o, board_size))
+    return schedule
+
+
+def _close_pool_agents() -> None:
+    for runner in _pool_agents.values():
+        runner.close()
+    _pool_agents.clear()
+
+
+def _init_pool_process() -> None:
+    # Agent workers are non-daemonic children; close them before the pool process joins them on exit
+    util.Finalize(None, _close_pool_agents, exitpriority=10)
+
+
+def _get_pool_agent(agent_name: str, in_process: bool):
+    runner = _pool_agents.get(agent_name)
+    if runner is None:
+        runner = start_agent(agent_name, in_process)
+        _pool_agents[agent_name] = runner
+    return runner
+
+
+def _play_scheduled_game(entry: Tuple[int, str, str, int], time_limit: float, max_turns: int,
+                         in_process: bool, replays_dir: Optional[str], binary_replays: bool) -> Dict[str, Any]:
+    index, agent_x, agent_o, board_size = entry
+    runners = {}
+    for symbol, agent_name in (('X', agent_x), ('O', agent_o)):
+        try:
+            runners[symbol] = _get_pool_agent(agent_name, in_process)
+        except Exception as e:
+            print(f"Agent '{agent_name}' could not be started: {e}")
+    if len(runners) < 2:
+        # A side whose agent cannot be started forfeits the game; nothing is recorded
+        winner = "Draw" if not runners else next(iter(runners))
+        return {"index": index, "agent_x": agent_x, "agent_o": agent_o, "board_size": board_size,
+                "winner": winner, "turns": 0, "forfeit": True}
+    result = play_game(runners['X'], runners['O'], board_size, time_limit, max_turns)
+    if replays_dir is not None:
+        save_game_replay(result, agent_x, agent_o, board_size, replays_dir, suffix=f"t{index:06d}",
+                         binary=binary_replays)
+    return {"index": index, "agent_x": agent_x, "agent_o": agent_o, "board_size": board_size,
+            "winner": result["winner"], "turns": result["turns"], "forfeit": False}
+
+
+def run_tournament(agents: List[str], sizes: List[int], games_per_pairing: int = 1,
+                   workers: Optional[int] = None, time_limit: float = AGENT_TIME_LIMIT,
+                   max_turns: int = MAX_TURNS, in_process: bool = False,
+                   replays_dir: Optional[str] = REPLAYS_DIR, binary_replays: bool = False) -> List[Dict[str, Any]]:
+    """
+    Plays the full schedule on a pool of `workers` processes (default: CPU count) and
+    returns one result dict per game, in schedule order. A side whose agent cannot be started
+    in a pool process forfeits that game (`forfeit` is set). The games already fill the cores, so
+    agents get one search process each unless AGENT_SEARCH_WORKERS_ENV is already set.
+    """
+    limit_agent_search_workers()
+    if replays_dir is not None:
+        ensure_replays_dir(replays_dir)
+    schedule = build_schedule(agents, sizes, games_per_pairing)
+    results: List[Dict[str, Any]] = []
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_pool_process) as pool:
+        futures = [pool.submit(_play_scheduled_game, entry, time_limit, max_turns, in_process, replays_dir,
+                               binary_replays)
+                   for entry in schedule]
+        for done, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            results.append(result)
+            print(f"[{done}/{len(schedule)}] {result['board_size']}x{result['board_size']} "
+                  f"{result['agent_x']} (X) vs {result['agent_o']} (O): {result['winner']}"
+                  f"{' (forfeit)' if result['forfeit'] else ''}")
+
+    results.sort(key=lambda r: r["index"])
+    return results
+
+
+def compute_standings(agents: List[str], results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Win/draw/loss counts and Elo ratings. Elo is updated game by game in schedule order,
+    so the ratings do not depend on which game happened to finish first.
+    """
+    table = {name: {"agent": name, "games": 0, "wins": 0, "draws": 0, "losses": 0, "elo": ELO_INITIAL}
+             for name in agents}
+
+    for result in results:
+        x_row, o_row = table[result["agent_x"]], table[result["agent_o"]]
+        if result["winner"] == 'X':
+            x_score = 1.0
+            x_row["wins"] += 1
+            o_row["losses"] += 1
+        elif result["winner"] == 'O':
+            x_score = 0.0
+            x_row["losses"] += 1
+            o_row["wins"] += 1
+        else:
+            x_score = 0.5
+            x_row["draws"] += 1
+            o_row["draws"] += 1
+        x_row["games"] += 1
+        o_row["games"] += 1
+
+        expected_x = 1.0 / (1.0 + 10 ** ((o_row["elo"] - x_row["elo"]) / 400.0))
+        delta = ELO_K_FACTOR * (x_score - expected_x)
+        x_row["elo"] += delta
+        o_row["elo"] -= delta
+
+    standings = sorted(table.values(), key=lambda row: row["elo"], reverse=True)
+    for row in standings:
+        row["win_rate"] = row["wins"] / row["games"] if row["games"] else 0.0
+    return standings
+
+
+def print_standings(standings: List[Dict[str, Any]]) -> None:
+    name_width = max([len("Agent")] + [len(row["agent"]) for row in standings])
+    print(f"{'Agent':<{name_width}}  {'Elo':>7}  {'Games':>5}  {'W':>5}  {'D':>5}  {'L':>5}  {'Win%':>6}")
+    for row in standings:
+        print(f"{row['agent']:<{name_width}}  {row['elo']:>7.1f}  {row['games']:>5}  {row['wins']:>5}  "
+              f"{row['draws']:>5}  {row['losses']:>5}  {100.0 * row['win_rate']:>5.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Round-robin XOShift tournament between all agents.")
+    parser.add_argument("--agents", nargs="*", help="agent modules to include (default: all in agents/)")
+    parser.add_argument("--sizes", nargs="*", type=int, default=[3, 4, 5], choices=[3, 4, 5])
+    parser.add_argument("--games-per-pairing", type=int, default=1,
+                        help="games per ordered pair of agents and board size")
+    parser.add_argument("--workers", type=int, default=None, help="pool size (default: CPU count)")
+    parser.add_argument("--time-limit", type=float, default=AGENT_TIME_LIMIT)
+    parser.add_argument("--max-turns", type=int, default=MAX_TURNS)
+    parser.add_argument("--in-process", action="store_true",
+                        help="call agents directly instead of in a worker process (trusted agents only)")
+    parser.add_argument("--replays-dir", default=REPLAYS_DIR)
+    parser.add_argument("--no-replays", action="store_true", help="do not write replay files")
+    parser.add_argument("--binary-replays", action="store_true", help="write compact binary replays")
+    parser.add_argument("--agent-search-workers", type=int, default=None,
+                        help="processes each agent's own search may use (default: 1)")
+    args = parser.parse_args()
+
+    limit_agent_search_workers(args.agent_search_workers)
+
+    agents = check_agents(args.agents or discover_agents(), args.in_process)
+    if len(agents) < 2:
+        parser.error("A tournament needs at least two agents.")
+
+    results = run_tournament(agents, args.sizes, args.games_per_pairing, args.workers,
+                             args.time_limit, args.max_turns, args.in_process,
+                             None if args.no_replays else args.replays_dir, args.binary_replays)
+    print_standings(compute_standings(agents, results))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,15 @@
-import os
+import sqlite3
+import time
 from typing import Optional, Tuple, List, Dict, Any
 
 import pygame
 
 from game import XOShiftGame
+from replay_cursor import ReplayCursor
+from replay_index import ReplayIndex
+from replay_io import REPLAYS_DIR, ensure_replays_dir
 from utils import load_font, draw_text_centered
 
-REPLAYS_DIR = "replays"
-
 
 class XOShiftUI:
     STATE_MENU = "menu"
@@ -43,6 +45,7 @@ class XOShiftUI:
         self.screen_height = screen.get_height()
 
         self.replay_finished = False
+        self.replay_cursor: Optional[ReplayCursor] = None
         self.selected_cell: Optional[Tuple[int, int]] = None
         self.record_replays_enabled = True
         self.player_types: Dict[str, str] = {}
@@ -64,10 +67,14 @@ class XOShiftUI:
         self.menu_options: Dict[str, Any] = {}
         self.selected_board_size = 5
         self.selected_mode = "human-human"
-        self.replay_files_list: List[str] = []
+        self.replay_index: Optional[ReplayIndex] = None
+        self.replay_total_count = 0
         self.replay_file_buttons: List[Dict[str, Any]] = []
         self.current_replay_page = 0
         self.items_per_replay_page = 8
+        self.replay_filter_size: Optional[int] = None
+        self.replay_filter_winner: Optional[str] = None
+        self.replay_sort = "newest"
 
         self._setup_menu_rects()
 
@@ -147,32 +154,74 @@ class XOShiftUI:
             self.screen_width // 2 - (self.ITEM_WIDTH_NORMAL + 40) // 2, y_offset, self.ITEM_WIDTH_NORMAL + 40,
             self.ITEM_HEIGHT), "action": "quit"}
 
+    def _open_replay_browser(self):
+        """
+        Brings the replay index up to date with the replays directory and shows the first page.
+        """
+        self.current_replay_page = 0
+        self.replay_total_count = 0
+        if self.replay_index is None:
+            ensure_replays_dir(REPLAYS_DIR)
+            try:
+                self.replay_index = ReplayIndex(REPLAYS_DIR)
+            except (OSError, sqlite3.Error) as e:
+                print(f"Error opening the replay index in {REPLAYS_DIR}: {e}. Cannot list replays.")
+        if self.replay_index is not None:
+            try:
+                self.replay_index.refresh()
+            except (OSError, sqlite3.Error) as e:
+                print(f"Error refreshing the replay index: {e}")
+        self._populate_replay_file_buttons()
+
+    def _cycle_replay_filter(self, action: str):
+        if action == "cycle_replay_size":
+            options = [None, 3, 4, 5]
+            self.replay_filter_size = options[(options.index(self.replay_filter_size) + 1) % len(options)]
+        elif action == "cycle_replay_winner":
+            options = [None, 'X', 'O', "Draw"]
+            self.replay_filter_winner = options[(options.index(self.replay_filter_winner) + 1) % len(options)]
+        elif action == "cycle_replay_sort":
+            options = ["newest", "oldest", "longest", "shortest"]
+            self.replay_sort = options[(options.index(self.replay_sort) + 1) % len(options)]
+        self.current_replay_page = 0
+        self._populate_replay_file_buttons()
+
     def _populate_replay_file_buttons(self):
         self.replay_file_buttons = []
-        if not os.path.exists(REPLAYS_DIR):
+        filter_y = 115
+        filter_width = 170
+        filter_height = 36
+        size_text = f"{self.replay_filter_size}x{self.replay_filter_size}" if self.replay_filter_size else "All"
+        filters = [(f"Size: {size_text}", "cycle_replay_size"),
+                   (f"Winner: {self.replay_filter_winner or 'All'}", "cycle_replay_winner"),
+                   (f"Sort: {self.replay_sort.capitalize()}", "cycle_replay_sort")]
+        for i, (text, action) in enumerate(filters):
+            rect = pygame.Rect(self.screen_width // 2 + (i - 1) * (filter_width + 15) - filter_width // 2,
+                               filter_y, filter_width, filter_height)
+            self.replay_file_buttons.append({"text": text, "rect": rect, "action": action})
+
+        rows: List[Dict[str, Any]] = []
+        self.replay_total_count = 0
+        if self.replay_index is not None:
             try:
-                os.makedirs(REPLAYS_DIR)
-                print(f"Created directory: {REPLAYS_DIR}")
-            except OSError as e:
-                print(f"Error creating directory {REPLAYS_DIR}: {e}. Cannot list replays.")
-                self.replay_file_buttons.append({"text": "Back to Menu",
-                                                 "rect": pygame.Rect(self.screen_width // 2 - 120,
-                                                                     self.screen_height - 140, 240, 50),
-                                                 "action": "return_to_menu"})
-                return
-
-        self.replay_files_list = sorted([f for f in os.listdir(REPLAYS_DIR) if f.endswith(".json")], reverse=True)
-        start_index = self.current_replay_page * self.items_per_replay_page
-        end_index = start_index + self.items_per_replay_page
-        files_to_display = self.replay_files_list[start_index:end_index]
-        y_offset = 150
-        button_width = 550
+                self.replay_total_count = self.replay_index.count(self.replay_filter_size, self.replay_filter_winner)
+                rows = self.replay_index.query(self.replay_filter_size, self.replay_filter_winner,
+                                               sort=self.replay_sort, limit=self.items_per_replay_page,
+                                               offset=self.current_replay_page * self.items_per_replay_page)
+            except sqlite3.Error as e:
+                print(f"Error reading the replay index: {e}")
+        end_index = (self.current_replay_page + 1) * self.items_per_replay_page
+        y_offset = 170
+        button_width = 650
         button_height = 50
-        for i, filename in enumerate(files_to_display):
+        for i, row in enumerate(rows):
             rect = pygame.Rect(self.screen_width // 2 - button_width // 2, y_offset + i * (button_height + 10),
                                button_width, button_height)
+            played = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["mtime_ns"] / 1e9))
+            text = (f"{played}  {row['board_size']}x{row['board_size']}  {row['player_x_type']} vs "
+                    f"{row['player_o_type']}  winner: {row['winner'] or '-'}  {row['move_count']} moves")
             self.replay_file_buttons.append(
-                {"text": filename, "rect": rect, "action": "select_replay_file", "value": filename})
+                {"text": text, "rect": rect, "action": "select_replay_file", "value": row["filename"]})
         nav_button_y = self.screen_height - 80
         nav_button_width = 120
         nav_button_height = 45
@@ -181,7 +230,7 @@ class XOShiftUI:
                                              "rect": pygame.Rect(self.screen_width // 2 - 200 - nav_button_width // 2,
                                                                  nav_button_y, nav_button_width, nav_button_height),
                                              "action": "prev_replay_page"})
-        if end_index < len(self.replay_files_list):
+        if end_index < self.replay_total_count:
             self.replay_file_buttons.append({"text": "Next >",
                                              "rect": pygame.Rect(self.screen_width // 2 + 200 - nav_button_width // 2,
                                                                  nav_button_y, nav_button_width, nav_button_height),
@@ -238,14 +287,12 @@ class XOShiftUI:
                 if button_info["rect"].collidepoint(mouse_pos):
                     self.selected_mode = button_info["value"]
                     if self.selected_mode == "replay-select-file":
-                        self.current_replay_page = 0
-                        self._populate_replay_file_buttons()
+                        self._open_replay_browser()
                         self.state = self.STATE_REPLAY_FILE_SELECT
                     return None
             if self.menu_options["start_button"]["rect"].collidepoint(mouse_pos):
                 if self.selected_mode == "replay-select-file":
-                    self.current_replay_page = 0
-                    self._populate_replay_file_buttons()
+                    self._open_replay_browser()
                     self.state = self.STATE_REPLAY_FILE_SELECT
                     return None
                 return {"action": "start_game", "size": self.selected_board_size, "mode": self.selected_mode,
@@ -264,13 +311,16 @@ class XOShiftUI:
                     elif button["action"] == "return_to_menu":
                         self.state = self.STATE_MENU
                         return None
+                    elif button["action"].startswith("cycle_replay_"):
+                        self._cycle_replay_filter(button["action"])
+                        return None
                     elif button["action"] == "prev_replay_page":
                         if self.current_replay_page > 0:
                             self.current_replay_page -= 1
                             self._populate_replay_file_buttons()
                         return None
                     elif button["action"] == "next_replay_page":
-                        if (self.current_replay_page + 1) * self.items_per_replay_page < len(self.replay_files_list):
+                        if (self.current_replay_page + 1) * self.items_per_replay_page < self.replay_total_count:
                             self.current_replay_page += 1
                             self._populate_replay_file_buttons()
                         return None
@@ -395,13 +445,12 @@ class XOShiftUI:
     def _draw_replay_file_list(self):
         draw_text_centered(self.screen, "Select a Replay File", self.title_font, self.MENU_TEXT_COLOR,
                            (self.screen_width // 2, 80))
-        if not self.replay_file_buttons and not self.replay_files_list:
-            draw_text_centered(self.screen, "No replay files found in 'replays' directory.", self.font, self.TEXT_COLOR,
-                               (self.screen_width // 2, 250))
-            back_button_info = next((b for b in self.replay_file_buttons if b["action"] == "return_to_menu"), None)
-            if back_button_info:
-                self._draw_menu_button(back_button_info)
-            return
+        if self.replay_total_count == 0:
+            if self.replay_filter_size or self.replay_filter_winner:
+                message = "No replays match the selected filters."
+            else:
+                message = "No replay files found in 'replays' directory."
+            draw_text_centered(self.screen, message, self.font, self.TEXT_COLOR, (self.screen_width // 2, 250))
         for button_info in self.replay_file_buttons:
             rect = button_info["rect"]
             text = button_info["text"]
@@ -432,7 +481,14 @@ class XOShiftUI:
         if self.state == self.STATE_WAITING:
             header_text = f"Player {current_player_symbol} ({player_info}) thinking..."
         elif self.state == self.STATE_REPLAY:
-            header_text = "Replay (left/right arrows)" if not self.replay_finished else "Replay Finished"
+            if self.replay_finished:
+                header_text = "Replay Finished"
+            elif self.replay_cursor:
+                cursor = self.replay_cursor
+                autoplay = f"auto x{cursor.autoplay_speed:g}" if cursor.autoplay else "space: autoplay"
+                header_text = f"Replay {cursor.ply}/{cursor.length} ({autoplay})"
+            else:
+                header_text = "Replay (left/right arrows)"
         else:
             header_text = f"Turn: {current_player_symbol} ({player_info})"
         draw_text_centered(self.screen, header_text, self.medium_font, self.TEXT_COLOR,
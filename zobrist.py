@@ -0,0 +1,42 @@
+import random
+from functools import lru_cache
+from typing import List, Optional
+
+ZOBRIST_SEED = 0x584F5368  # Fixed so hashes are stable across processes and runs.
+
+
+class ZobristKeys:
+    """
+    64-bit Zobrist keys for one board size.
+
+    `cell_keys[symbol][r * size + c]` is XORed in while `symbol` occupies (r, c);
+    `side_key` is XORed in when 'O' is to move.
+    """
+
+    def __init__(self, size: int):
+        rng = random.Random(ZOBRIST_SEED + size)
+        self.size = size
+        self.cell_keys = {
+            symbol: [rng.getrandbits(64) for _ in range(size * size)] for symbol in ('X', 'O')
+        }
+        self.side_key = rng.getrandbits(64)
+
+    def board_key(self, board: List[List[Optional[str]]]) -> int:
+        """
+        Hash of the pieces on `board`, without the side-to-move component.
+        """
+        size = self.size
+        key = 0
+        for r, row in enumerate(board):
+            for c, cell in enumerate(row):
+                if cell is not None:
+                    key ^= self.cell_keys[cell][r * size + c]
+        return key
+
+    def side_to_move_key(self, player_symbol: str) -> int:
+        return self.side_key if player_symbol == 'O' else 0
+
+
+@lru_cache(maxsize=None)
+def get_zobrist_keys(size: int) -> ZobristKeys:
+    return ZobristKeys(size)